@@ -0,0 +1,90 @@
+import base64
+import binascii
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.schemas import MovieDB, MovieTombstoneDB
+
+SAFETY_SECONDS = float(os.getenv("CHANGES_SAFETY_SECONDS", "5"))
+
+Cursor = Tuple[datetime, int]
+
+def encode_cursor(cursor: Optional[Cursor]) -> Optional[str]:
+    if cursor is None:
+        return None
+    changed_at, movie_id = cursor
+    raw = f"{changed_at.isoformat()}|{movie_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def decode_cursor(since: Optional[str], parameter: str = "since") -> Optional[Cursor]:
+    if not since:
+        return None
+    try:
+        return naive_utc(datetime.fromisoformat(since)), 0
+    except ValueError:
+        pass
+    try:
+        raw = base64.urlsafe_b64decode(since + "=" * (-len(since) % 4)).decode()
+        changed_at, movie_id = raw.split("|")
+        return datetime.fromisoformat(changed_at), int(movie_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Некорректный параметр {parameter}: ожидается курсор или дата в формате ISO 8601"
+        )
+
+def after(changed_at_column, id_column, cursor: Optional[Cursor]):
+    if cursor is None:
+        return []
+    changed_at, movie_id = cursor
+    return [
+        changed_at_column >= changed_at,
+        or_(changed_at_column > changed_at, id_column > movie_id)
+    ]
+
+async def get_changes(db: AsyncSession, since: Optional[str], limit: int) -> models.MovieChanges:
+    cursor = decode_cursor(since)
+    settled_before = datetime.utcnow() - timedelta(seconds=SAFETY_SECONDS)
+    
+    result = await db.execute(
+        select(MovieDB)
+        .where(MovieDB.updated_at < settled_before, *after(MovieDB.updated_at, MovieDB.id, cursor))
+        .order_by(MovieDB.updated_at, MovieDB.id)
+        .limit(limit + 1)
+    )
+    events = [(movie.updated_at, movie.id, movie) for movie in result.scalars().all()]
+    
+    result = await db.execute(
+        select(MovieTombstoneDB.deleted_at, MovieTombstoneDB.movie_id)
+        .where(
+            MovieTombstoneDB.deleted_at < settled_before,
+            *after(MovieTombstoneDB.deleted_at, MovieTombstoneDB.movie_id, cursor)
+        )
+        .order_by(MovieTombstoneDB.deleted_at, MovieTombstoneDB.movie_id)
+        .limit(limit + 1)
+    )
+    events.extend((deleted_at, movie_id, None) for deleted_at, movie_id in result.all())
+    
+    events.sort(key=lambda event: event[:2])
+    has_more = len(events) > limit
+    events = events[:limit]
+    if events:
+        cursor = events[-1][:2]
+    
+    return models.MovieChanges(
+        upserted=[models.MovieResponse.model_validate(movie) for _, _, movie in events if movie is not None],
+        deleted=[movie_id for _, movie_id, movie in events if movie is None],
+        next_cursor=encode_cursor(cursor),
+        has_more=has_more
+    )
@@ -0,0 +1,95 @@
+import asyncio
+import re
+from typing import Dict, List, Optional, Tuple
+
+COALESCED_PATHS = (
+    re.compile(r"^/movies/$"),
+    re.compile(r"^/movies/\d+$"),
+    re.compile(r"^/movies/\d+/reviews$"),
+    re.compile(r"^/movies/(facets|changes|reviews-preview|trending)$"),
+    re.compile(r"^/reviews/$"),
+)
+KEY_HEADERS = (b"accept", b"accept-encoding", b"if-none-match", b"if-modified-since")
+
+stats = {"leaders": 0, "followers": 0}
+
+def normalized_query(query_string: bytes) -> str:
+    pairs = [pair for pair in query_string.decode("latin-1").split("&") if pair]
+    return "&".join(sorted(pairs))
+
+def request_key(scope) -> Optional[Tuple]:
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None
+    headers = dict(scope["headers"])
+    if b"authorization" in headers:
+        return None
+    if not any(pattern.match(scope["path"]) for pattern in COALESCED_PATHS):
+        return None
+    return (
+        scope["path"],
+        normalized_query(scope["query_string"]),
+        *[headers.get(name, b"") for name in KEY_HEADERS],
+    )
+
+class SingleFlightMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.in_flight: Dict[Tuple, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        key = request_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        shared = self.in_flight.get(key)
+        if shared is not None:
+            try:
+                messages = await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+            else:
+                stats["followers"] += 1
+                for message in messages:
+                    await send(message)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        await self.lead(key, scope, receive, send)
+
+    async def lead(self, key, scope, receive, send):
+        shared = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = shared
+        stats["leaders"] += 1
+        start: Optional[dict] = None
+        body: List[bytes] = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                shared.cancel()
+            else:
+                shared.set_exception(e)
+                shared.exception()
+            raise
+        else:
+            if start is None:
+                shared.cancel()
+            else:
+                shared.set_result([
+                    start,
+                    {"type": "http.response.body", "body": b"".join(body), "more_body": False},
+                ])
+        finally:
+            self.in_flight.pop(key, None)
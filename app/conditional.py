@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+from app.static_files import etag_matches
+
+def make_etag(request: Request, *parts) -> str:
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    raw = "|".join([request.url.path, query, *[str(part) for part in parts]])
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"etag": etag, "cache-control": "no-cache", "vary": "Accept"}
+    if last_modified is not None:
+        headers["last-modified"] = http_date(last_modified)
+    return headers
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]):
+    response.headers.update(validator_headers(etag, last_modified))
@@ -1,13 +1,25 @@
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.future import select
 from fastapi import HTTPException, status, UploadFile
-from typing import List, Optional
+from collections import Counter
+from typing import Any, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
 from datetime import datetime
-import shutil
-import os
 from app import models
 from app import auth
-from app.schemas import MovieDB, ReviewDB, UserDB
+from app import events
+from app import facets
+from app import images
+from app import jobs
+from app import login_tracker
+from app import movie_cache
+from app import ranking
+from app import response_cache
+from app import review_summary
+from app import storage
+from app.schemas import MovieDB, MovieTombstoneDB, ReviewDB, ReviewTombstoneDB, UserDB
 
 async def create_user(db: AsyncSession, user: models.UserCreate):
     existing_user = await auth.get_user_by_username(db, user.username)
@@ -38,13 +50,93 @@ async def create_user(db: AsyncSession, user: models.UserCreate):
     await db.refresh(db_user)
     return db_user
 
+async def delete_user(db: AsyncSession, user_id: int):
+    user = await db.get(UserDB, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден"
+        )
+    
+    result = await db.execute(select(ReviewDB.movie_id).where(ReviewDB.user_id == user_id).distinct())
+    reviewed_movie_ids = result.scalars().all()
+    result = await db.execute(select(MovieDB.id).where(MovieDB.added_by == user_id))
+    added_movie_ids = result.scalars().all()
+    
+    await db.execute(
+        update(MovieDB)
+        .where(MovieDB.added_by == user_id)
+        .values(added_by=None)
+        .execution_options(synchronize_session=False)
+    )
+    await record_review_deletions(db, [ReviewDB.user_id == user_id])
+    await db.execute(delete(UserDB).where(UserDB.id == user_id))
+    if reviewed_movie_ids:
+        await jobs.enqueue(db, "recompute_movies", {"movie_ids": list(reviewed_movie_ids)})
+    await db.commit()
+    jobs.wake()
+    login_tracker.discard(user_id)
+    
+    await invalidate_movies(added_movie_ids)
+    await events.publish(events.UserDeleted(user_id=user_id, movie_ids=[*reviewed_movie_ids, *added_movie_ids]))
+    return {"message": "Пользователь удален"}
+
+AGGREGATE_BATCH_SIZE = 500
+BULK_MAX_ITEMS = 500
+
+MOVIE_SORTS = {
+    "rating": (MovieDB.rating.asc(), MovieDB.id.asc()),
+    "-rating": (MovieDB.rating.desc(), MovieDB.id.desc()),
+    "-weighted_score": (MovieDB.weighted_score.desc(), MovieDB.id.desc()),
+    "year": (MovieDB.year.asc(), MovieDB.id.asc()),
+    "-created_at": (MovieDB.created_at.desc(), MovieDB.id.desc()),
+    "title": (MovieDB.title.asc(), MovieDB.id.asc()),
+}
+MOVIE_SORT_PATTERN = "^(" + "|".join(MOVIE_SORTS) + ")$"
+
+def apply_movie_sort(query, sort: Optional[str]):
+    if sort:
+        query = query.order_by(*MOVIE_SORTS[sort])
+    return query
+
+MOVIE_FIELDS = tuple(name for name in models.MovieResponse.model_fields if name != "review_summary")
+MOVIE_FIELDS_DESCRIPTION = "Поля через запятую (id добавляется всегда): " + ", ".join(MOVIE_FIELDS)
+
+def parse_movie_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [item.strip() for item in fields.split(",") if item.strip()]
+    unknown = sorted(set(requested) - set(MOVIE_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Неизвестные поля: {', '.join(unknown)}"
+        )
+    return list(dict.fromkeys(["id", *requested]))
+
+def movie_columns(fields: List[str], size: Optional[int] = None) -> list:
+    names = list(fields)
+    if size and "photo_url" in names and "photo_renditions" not in names:
+        names.append("photo_renditions")
+    return [getattr(MovieDB, name) for name in names]
+
+def project_movie_rows(rows, fields: List[str], size: Optional[int] = None, image_format: str = "jpeg") -> List[dict]:
+    items = []
+    for row in rows:
+        item = {name: getattr(row, name) for name in fields}
+        if size and "photo_url" in item:
+            item["photo_url"] = images.pick_rendition(row, size, image_format)
+        items.append(item)
+    return items
+
 async def get_movies(
     db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     genre: Optional[str] = None,
     min_rating: Optional[float] = None,
-    title: Optional[str] = None
+    title: Optional[str] = None,
+    sort: Optional[str] = None
 ):
     query = select(MovieDB)
     
@@ -57,15 +149,13 @@ async def get_movies(
     if title:
         query = query.where(MovieDB.title.contains(title))
     
+    query = apply_movie_sort(query, sort)
     query = query.offset(skip).limit(limit)
     result = await db.execute(query)
     return result.scalars().all()
 
 async def get_movie(db: AsyncSession, movie_id: int):
-    result = await db.execute(
-        select(MovieDB).where(MovieDB.id == movie_id)
-    )
-    movie = result.scalar_one_or_none()
+    movie = await db.get(MovieDB, movie_id)
     
     if movie is None:
         raise HTTPException(
@@ -75,6 +165,81 @@ async def get_movie(db: AsyncSession, movie_id: int):
     
     return movie
 
+async def get_movie_snapshot(db: AsyncSession, movie_id: int) -> models.MovieResponse:
+    cached = await movie_cache.get(movie_id)
+    if cached is not None:
+        return models.MovieResponse.model_validate(cached)
+    
+    loaded_generation = await movie_cache.generation(movie_id)
+    snapshot = models.MovieResponse.model_validate(await get_movie(db, movie_id))
+    await movie_cache.put(movie_id, snapshot.model_dump(mode="json"), loaded_generation)
+    return snapshot
+
+async def invalidate_movie(movie_id: int):
+    await movie_cache.invalidate(movie_id)
+    response_cache.purge(f"movie:{movie_id}", "catalog")
+
+async def invalidate_movies(movie_ids: Iterable[int]):
+    movie_ids = set(movie_ids)
+    for movie_id in movie_ids:
+        await movie_cache.invalidate(movie_id)
+    response_cache.purge(*[f"movie:{movie_id}" for movie_id in movie_ids], "catalog")
+
+async def invalidate_remote_change(event: events.DomainEvent):
+    if isinstance(event, events.MoviesCreated):
+        response_cache.purge("catalog")
+    elif isinstance(event, (events.MovieUpdated, events.MovieDeleted)):
+        await invalidate_movie(event.movie_id)
+    else:
+        await invalidate_movies(event.movie_ids)
+
+events.subscribe(invalidate_remote_change, remote_only=True)
+
+async def recompute_movie_aggregates(db: AsyncSession, movie_ids: Iterable[int]):
+    movie_ids = sorted(set(movie_ids))
+    facet_deltas = Counter()
+    average_rating = (
+        select(func.avg(ReviewDB.rating) * 2)
+        .where(ReviewDB.movie_id == MovieDB.id)
+        .scalar_subquery()
+    )
+    
+    for start in range(0, len(movie_ids), AGGREGATE_BATCH_SIZE):
+        batch = movie_ids[start:start + AGGREGATE_BATCH_SIZE]
+        facet_columns = select(MovieDB.rating, MovieDB.genre, MovieDB.year).where(MovieDB.id.in_(batch))
+        
+        for row in (await db.execute(facet_columns)).all():
+            facet_deltas.subtract(facets.facet_values(row))
+        await db.execute(
+            update(MovieDB)
+            .where(MovieDB.id.in_(batch))
+            .values(rating=func.coalesce(average_rating, 0.0))
+            .execution_options(synchronize_session=False)
+        )
+        for row in (await db.execute(facet_columns)).all():
+            facet_deltas.update(facets.facet_values(row))
+        
+        await review_summary.rebuild(db, batch)
+        await ranking.rescore(db, batch)
+    
+    await facets.apply_deltas(db, facet_deltas)
+
+async def enqueue_recompute(db: AsyncSession, movie_id: int):
+    await jobs.enqueue(db, "recompute_movies", {"movie_ids": [movie_id]}, idempotency_key=f"recompute:{movie_id}")
+
+async def run_recompute_job(db: AsyncSession, payload: dict):
+    movie_ids = payload["movie_ids"]
+    await recompute_movie_aggregates(db, movie_ids)
+    await db.commit()
+    await invalidate_movies(movie_ids)
+    await events.publish(events.MoviesRescored(movie_ids=movie_ids))
+
+async def run_purge_photos_job(db: AsyncSession, payload: dict):
+    await storage.purge_unreferenced(db, payload["paths"])
+
+jobs.register("recompute_movies", run_recompute_job)
+jobs.register("purge_photos", run_purge_photos_job)
+
 async def create_movie(
     db: AsyncSession,
     movie: models.MovieCreate,
@@ -84,25 +249,27 @@ async def create_movie(
     photo_url = "static/default_movie.jpg"
     
     if photo and photo.filename:
-        os.makedirs("static/uploads", exist_ok=True)
-        file_extension = os.path.splitext(photo.filename)[1]
-        unique_filename = f"{datetime.now().timestamp()}{file_extension}"
-        photo_path = f"static/uploads/{unique_filename}"
-        
-        with open(photo_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
-        
-        photo_url = photo_path
+        photo_url = await storage.save_upload(db, photo)
     
     db_movie = MovieDB(
         **movie.dict(),
+        weighted_score=ranking.weighted_score(0, movie.rating, await ranking.global_mean(db)),
         photo_url=photo_url,
+        photo_renditions=images.existing_renditions(photo_url),
         added_by=user_id
     )
     
     db.add(db_movie)
+    await db.flush()
+    await db.execute(delete(MovieTombstoneDB).where(MovieTombstoneDB.movie_id == db_movie.id))
+    await facets.adjust(db, set(), facets.facet_values(db_movie))
     await db.commit()
+    response_cache.purge("catalog")
+    await events.publish(events.MoviesCreated(movie_ids=[db_movie.id]))
     await db.refresh(db_movie)
+    
+    if photo_url != "static/default_movie.jpg" and db_movie.photo_renditions is None:
+        images.schedule_renditions(db_movie.id, photo_url)
     return db_movie
 
 async def update_movie(
@@ -114,39 +281,51 @@ async def update_movie(
     db_movie = await get_movie(db, movie_id)
     
     update_data = movie_update.dict(exclude_unset=True)
+    old_photo_url = db_movie.photo_url
+    old_facets = facets.facet_values(db_movie)
     
     if photo and photo.filename:
-        if db_movie.photo_url and db_movie.photo_url != "static/default_movie.jpg":
-            if os.path.exists(db_movie.photo_url):
-                os.remove(db_movie.photo_url)
-        
-        os.makedirs("static/uploads", exist_ok=True)
-        file_extension = os.path.splitext(photo.filename)[1]
-        unique_filename = f"{datetime.now().timestamp()}{file_extension}"
-        photo_path = f"static/uploads/{unique_filename}"
-        
-        with open(photo_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
+        photo_path = await storage.save_upload(db, photo)
+        await storage.release(db, old_photo_url)
         
         update_data["photo_url"] = photo_path
+        update_data["photo_renditions"] = images.existing_renditions(photo_path)
+        update_data["photo_render_failed_at"] = None
     
     for field, value in update_data.items():
         setattr(db_movie, field, value)
     
     db_movie.updated_at = datetime.utcnow()
+    await facets.adjust(db, old_facets, facets.facet_values(db_movie))
+    if "rating" in update_data:
+        await ranking.rescore(db, [movie_id])
+    if "photo_url" in update_data:
+        await jobs.enqueue(db, "purge_photos", {"paths": [old_photo_url]})
     await db.commit()
+    jobs.wake()
+    await invalidate_movie(movie_id)
+    await events.publish(events.MovieUpdated(movie_id=movie_id))
     await db.refresh(db_movie)
+    
+    if "photo_url" in update_data:
+        if db_movie.photo_renditions is None:
+            images.schedule_renditions(db_movie.id, db_movie.photo_url)
     return db_movie
 
 async def delete_movie(db: AsyncSession, movie_id: int):
     db_movie = await get_movie(db, movie_id)
+    photo_url = db_movie.photo_url
     
-    if db_movie.photo_url and db_movie.photo_url != "static/default_movie.jpg":
-        if os.path.exists(db_movie.photo_url):
-            os.remove(db_movie.photo_url)
-    
+    await storage.release(db, photo_url)
+    await facets.adjust(db, facets.facet_values(db_movie), set())
+    await review_summary.on_movie_deleted(db, movie_id)
+    db.add(MovieTombstoneDB(movie_id=movie_id))
     await db.delete(db_movie)
+    await jobs.enqueue(db, "purge_photos", {"paths": [photo_url]})
     await db.commit()
+    jobs.wake()
+    await invalidate_movie(movie_id)
+    await events.publish(events.MovieDeleted(movie_id=movie_id))
     return {"message": "Фильм удален"}
 
 async def create_review(
@@ -154,7 +333,7 @@ async def create_review(
     review: models.ReviewCreate,
     user_id: int
 ):
-    movie = await get_movie(db, review.movie_id)
+    await get_movie(db, review.movie_id)
     
     result = await db.execute(
         select(ReviewDB).where(
@@ -175,13 +354,14 @@ async def create_review(
         user_id=user_id
     )
     
-    movie_reviews = await get_movie_reviews(db, review.movie_id)
-    total_rating = sum([r.rating * 2 for r in movie_reviews]) + (review.rating * 2)  # Конвертация в 0-10
-    movie.rating = total_rating / (len(movie_reviews) + 1)
-    
     db.add(db_review)
+    await review_summary.on_review_created(db, db_review)
+    await enqueue_recompute(db, review.movie_id)
     await db.commit()
+    jobs.wake()
+    await invalidate_movie(review.movie_id)
     await db.refresh(db_review)
+    await events.publish(events.ReviewsChanged(action="created", movie_ids=[review.movie_id], review_ids=[db_review.id]))
     return db_review
 
 async def get_movie_reviews(db: AsyncSession, movie_id: int):
@@ -193,6 +373,123 @@ async def get_movie_reviews(db: AsyncSession, movie_id: int):
     )
     return result.scalars().all()
 
+REVIEW_COLUMNS = (
+    ReviewDB.id,
+    ReviewDB.movie_id,
+    ReviewDB.user_id,
+    ReviewDB.rating,
+    ReviewDB.comment,
+    ReviewDB.created_at,
+)
+
+async def get_movie_review_rows(db: AsyncSession, movie_id: int) -> List[dict]:
+    result = await db.execute(
+        select(*REVIEW_COLUMNS, UserDB.username, UserDB.email.label("user_email"))
+        .join(UserDB, UserDB.id == ReviewDB.user_id)
+        .where(ReviewDB.movie_id == movie_id)
+    )
+    return [dict(row) for row in result.mappings()]
+
+def review_filter_conditions(
+    ids: Optional[List[int]] = None,
+    user_id: Optional[int] = None,
+    movie_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    comment_contains: Optional[str] = None
+) -> list:
+    conditions = []
+    if ids is not None:
+        conditions.append(ReviewDB.id.in_(ids))
+    if user_id is not None:
+        conditions.append(ReviewDB.user_id == user_id)
+    if movie_id is not None:
+        conditions.append(ReviewDB.movie_id == movie_id)
+    if created_from is not None:
+        conditions.append(ReviewDB.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(ReviewDB.created_at < created_to)
+    if comment_contains:
+        conditions.append(ReviewDB.comment.contains(comment_contains))
+    return conditions
+
+async def get_reviews_with_details(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    movie_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    skip: int = 0,
+    limit: Optional[int] = None
+) -> List[dict]:
+    query = (
+        select(
+            *REVIEW_COLUMNS,
+            func.coalesce(UserDB.username, "Неизвестный").label("username"),
+            UserDB.email.label("user_email"),
+            func.coalesce(MovieDB.title, "Неизвестный фильм").label("movie_title"),
+            func.coalesce(MovieDB.director, "Неизвестный режиссер").label("movie_director")
+        )
+        .outerjoin(UserDB, UserDB.id == ReviewDB.user_id)
+        .outerjoin(MovieDB, MovieDB.id == ReviewDB.movie_id)
+        .order_by(ReviewDB.created_at.desc(), ReviewDB.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    query = query.where(*review_filter_conditions(
+        user_id=user_id,
+        movie_id=movie_id,
+        created_from=created_from,
+        created_to=created_to
+    ))
+    if before is not None:
+        created_at, review_id = before
+        query = query.where(
+            ReviewDB.created_at <= created_at,
+            or_(ReviewDB.created_at < created_at, ReviewDB.id < review_id)
+        )
+    
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings()]
+
+async def get_review_previews(db: AsyncSession, movie_ids: List[int], per_movie: int = 3):
+    ranked = (
+        select(
+            ReviewDB.id,
+            ReviewDB.movie_id,
+            ReviewDB.user_id,
+            ReviewDB.rating,
+            ReviewDB.comment,
+            ReviewDB.created_at,
+            func.row_number().over(
+                partition_by=ReviewDB.movie_id,
+                order_by=(ReviewDB.created_at.desc(), ReviewDB.id.desc())
+            ).label("position"),
+            func.count().over(partition_by=ReviewDB.movie_id).label("total")
+        )
+        .where(ReviewDB.movie_id.in_(movie_ids))
+        .subquery()
+    )
+    
+    result = await db.execute(
+        select(ranked, UserDB.username, UserDB.email.label("user_email"))
+        .join(UserDB, UserDB.id == ranked.c.user_id)
+        .where(ranked.c.position <= per_movie)
+        .order_by(ranked.c.movie_id, ranked.c.position)
+    )
+    
+    previews = {
+        movie_id: models.MovieReviewsPreview(movie_id=movie_id, total=0, reviews=[])
+        for movie_id in movie_ids
+    }
+    for row in result.mappings():
+        preview = previews[row["movie_id"]]
+        preview.total = row["total"]
+        preview.reviews.append(models.ReviewWithUserResponse(**row))
+    
+    return list(previews.values())
+
 async def get_user_reviews(db: AsyncSession, user_id: int):
     from sqlalchemy.orm import selectinload
     result = await db.execute(
@@ -223,33 +520,186 @@ async def update_review(db: AsyncSession, review_id: int, review_update: models.
     for field, value in update_data.items():
         setattr(review, field, value)
     
+    await review_summary.on_review_updated(db, review, old_rating)
+    if 'rating' in update_data:
+        await enqueue_recompute(db, review.movie_id)
     await db.commit()
+    jobs.wake()
     await db.refresh(review)
     
-    if 'rating' in update_data:
-        movie = await get_movie(db, review.movie_id)
-        movie_reviews = await get_movie_reviews(db, review.movie_id)
-        if movie_reviews:
-            total_rating = sum([r.rating * 2 for r in movie_reviews])
-            movie.rating = total_rating / len(movie_reviews)
-            await db.commit()
-    
+    await invalidate_movie(review.movie_id)
+    await events.publish(events.ReviewsChanged(action="updated", movie_ids=[review.movie_id], review_ids=[review_id]))
     return review
 
+async def record_review_deletions(db: AsyncSession, conditions: list):
+    await db.execute(
+        insert(ReviewTombstoneDB).from_select(
+            ["review_id", "movie_id"],
+            select(ReviewDB.id, ReviewDB.movie_id).where(*conditions)
+        )
+    )
+
 async def delete_review(db: AsyncSession, review_id: int):
     review = await get_review(db, review_id)
     movie_id = review.movie_id
     
+    await record_review_deletions(db, [ReviewDB.id == review_id])
     await db.delete(review)
+    await review_summary.on_review_deleted(db, review)
+    await enqueue_recompute(db, movie_id)
     await db.commit()
+    jobs.wake()
+    await invalidate_movie(movie_id)
+    await events.publish(events.ReviewsChanged(action="deleted", movie_ids=[movie_id], review_ids=[review_id]))
+    return {"message": "Отзыв успешно удален"}
+
+async def bulk_delete_reviews(db: AsyncSession, conditions: list) -> models.BulkDeleteResult:
+    if not conditions:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Укажите хотя бы один критерий отбора отзывов"
+        )
     
-    movie = await get_movie(db, movie_id)
-    movie_reviews = await get_movie_reviews(db, movie_id)
-    if movie_reviews:
-        total_rating = sum([r.rating * 2 for r in movie_reviews])
-        movie.rating = total_rating / len(movie_reviews)
-    else:
-        movie.rating = 0.0
+    result = await db.execute(select(ReviewDB.movie_id).where(*conditions).distinct())
+    movie_ids = result.scalars().all()
     
+    await record_review_deletions(db, conditions)
+    result = await db.execute(
+        delete(ReviewDB).where(*conditions).execution_options(synchronize_session=False)
+    )
+    deleted = result.rowcount
+    await recompute_movie_aggregates(db, movie_ids)
     await db.commit()
-    return {"message": "Отзыв успешно удален"}
\ No newline at end of file
+    
+    await invalidate_movies(movie_ids)
+    await events.publish(events.ReviewsChanged(action="deleted", movie_ids=movie_ids))
+    return models.BulkDeleteResult(deleted=deleted, movies_updated=len(movie_ids))
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" if item["loc"] else item["msg"]
+        for item in error.errors()
+    )
+
+def validate_bulk_items(items: List[Any], model) -> Tuple[list, List[models.BulkItemResult]]:
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Не более {BULK_MAX_ITEMS} элементов за запрос"
+        )
+    
+    valid = []
+    results = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(item)))
+            results.append(models.BulkItemResult(index=index))
+        except ValidationError as e:
+            results.append(models.BulkItemResult(index=index, error=validation_message(e)))
+    return valid, results
+
+def bulk_result(results: List[models.BulkItemResult]) -> models.BulkCreateResult:
+    created = sum(1 for item in results if item.error is None)
+    return models.BulkCreateResult(created=created, failed=len(results) - created, results=results)
+
+async def bulk_create_movies(db: AsyncSession, items: List[Any], user_id: int) -> models.BulkCreateResult:
+    valid, results = validate_bulk_items(items, models.MovieCreate)
+    
+    if valid:
+        mean = await ranking.global_mean(db)
+        rows = [
+            {
+                **movie.model_dump(),
+                "weighted_score": ranking.weighted_score(0, movie.rating, mean),
+                "photo_url": "static/default_movie.jpg",
+                "added_by": user_id
+            }
+            for _, movie in valid
+        ]
+        result = await db.execute(insert(MovieDB).returning(MovieDB.id, sort_by_parameter_order=True), rows)
+        movie_ids = result.scalars().all()
+        
+        await db.execute(delete(MovieTombstoneDB).where(MovieTombstoneDB.movie_id.in_(movie_ids)))
+        facet_deltas = Counter()
+        for _, movie in valid:
+            facet_deltas.update(facets.facet_values(movie))
+        await facets.apply_deltas(db, facet_deltas)
+        await db.commit()
+        response_cache.purge("catalog")
+        await events.publish(events.MoviesCreated(movie_ids=movie_ids))
+        
+        for (index, _), movie_id in zip(valid, movie_ids):
+            results[index].id = movie_id
+    
+    return bulk_result(results)
+
+async def insert_bulk_reviews(
+    db: AsyncSession,
+    accepted: List[tuple],
+    results: List[models.BulkItemResult],
+    user_id: int
+) -> Tuple[List[tuple], List[int]]:
+    while accepted:
+        rows = [{**review.model_dump(), "user_id": user_id} for _, review in accepted]
+        try:
+            async with db.begin_nested():
+                result = await db.execute(insert(ReviewDB).returning(ReviewDB.id, sort_by_parameter_order=True), rows)
+            return accepted, result.scalars().all()
+        except IntegrityError:
+            result = await db.execute(
+                select(MovieDB.id).where(MovieDB.id.in_({review.movie_id for _, review in accepted}))
+            )
+            existing_movie_ids = set(result.scalars().all())
+        
+        remaining = []
+        for index, review in accepted:
+            if review.movie_id in existing_movie_ids:
+                remaining.append((index, review))
+            else:
+                results[index].error = "Фильм не найден"
+        if len(remaining) == len(accepted):
+            for index, _ in accepted:
+                results[index].error = "Не удалось сохранить отзыв"
+            remaining = []
+        accepted = remaining
+    return [], []
+
+async def bulk_create_reviews(db: AsyncSession, items: List[Any], user_id: int) -> models.BulkCreateResult:
+    valid, results = validate_bulk_items(items, models.ReviewCreate)
+    requested_movie_ids = {review.movie_id for _, review in valid}
+    
+    existing_movie_ids = set()
+    reviewed_movie_ids = set()
+    if requested_movie_ids:
+        result = await db.execute(select(MovieDB.id).where(MovieDB.id.in_(requested_movie_ids)))
+        existing_movie_ids = set(result.scalars().all())
+        result = await db.execute(
+            select(ReviewDB.movie_id).where(
+                ReviewDB.user_id == user_id,
+                ReviewDB.movie_id.in_(requested_movie_ids)
+            )
+        )
+        reviewed_movie_ids = set(result.scalars().all())
+    
+    accepted = []
+    for index, review in valid:
+        if review.movie_id not in existing_movie_ids:
+            results[index].error = "Фильм не найден"
+        elif review.movie_id in reviewed_movie_ids:
+            results[index].error = "Вы уже оставляли отзыв на этот фильм"
+        else:
+            reviewed_movie_ids.add(review.movie_id)
+            accepted.append((index, review))
+    
+    accepted, review_ids = await insert_bulk_reviews(db, accepted, results, user_id)
+    if accepted:
+        movie_ids = {review.movie_id for _, review in accepted}
+        await recompute_movie_aggregates(db, movie_ids)
+        await db.commit()
+        await invalidate_movies(movie_ids)
+        await events.publish(events.ReviewsChanged(action="created", movie_ids=sorted(movie_ids), review_ids=review_ids))
+        
+        for (index, _), review_id in zip(accepted, review_ids):
+            results[index].id = review_id
+    
+    return bulk_result(results)
@@ -1,3 +1,5 @@
+from sqlalchemy import event, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
@@ -13,6 +15,13 @@ engine = create_async_engine(
     future=True
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
@@ -21,6 +30,14 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+def upsert(table):
+    dialect = postgresql if engine.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+SUPERSEDED_INDEXES = {
+    "movies": ("ix_movies_rating", "ix_movies_title"),
+}
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -28,6 +45,76 @@ async def get_db():
         finally:
             await session.close()
 
+def add_missing_columns(sync_conn):
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+def add_missing_indexes(sync_conn):
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(sync_conn)
+
+def drop_superseded_indexes(sync_conn):
+    inspector = inspect(sync_conn)
+    for table_name, index_names in SUPERSEDED_INDEXES.items():
+        if not inspector.has_table(table_name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        for index_name in index_names:
+            if index_name in existing:
+                sync_conn.execute(text(f"DROP INDEX {index_name}"))
+
+def foreign_keys_outdated(inspector, table) -> bool:
+    existing = {
+        (tuple(fk["constrained_columns"]), fk["referred_table"]): (fk.get("options") or {}).get("ondelete")
+        for fk in inspector.get_foreign_keys(table.name)
+    }
+    for fk in table.foreign_keys:
+        key = ((fk.parent.name,), fk.column.table.name)
+        if key in existing and (existing[key] or "").upper() != (fk.ondelete or "").upper():
+            return True
+    return False
+
+def upgrade_foreign_keys(sync_conn):
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name) or not foreign_keys_outdated(inspector, table):
+            continue
+        
+        old_name = f"{table.name}__old"
+        columns = [column["name"] for column in inspector.get_columns(table.name)]
+        for index in inspector.get_indexes(table.name):
+            sync_conn.execute(text(f"DROP INDEX {index['name']}"))
+        sync_conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+        table.create(sync_conn)
+        
+        for fk in table.foreign_keys:
+            if fk.ondelete:
+                sync_conn.execute(text(
+                    f"DELETE FROM {old_name} WHERE {fk.parent.name} IS NOT NULL AND {fk.parent.name} NOT IN "
+                    f"(SELECT {fk.column.name} FROM {fk.column.table.name})"
+                ))
+        copied = ", ".join(column for column in columns if column in table.columns)
+        sync_conn.execute(text(f"INSERT INTO {table.name} ({copied}) SELECT {copied} FROM {old_name}"))
+        sync_conn.execute(text(f"DROP TABLE {old_name}"))
+
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(upgrade_foreign_keys)
+        await conn.run_sync(add_missing_indexes)
+        await conn.run_sync(drop_superseded_indexes)
\ No newline at end of file
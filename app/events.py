@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field
+
+QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "10000"))
+PUBLISH_TIMEOUT_SECONDS = float(os.getenv("EVENT_PUBLISH_TIMEOUT_SECONDS", "0.05"))
+BUS_URL = os.getenv("EVENT_BUS_URL", "")
+CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "movies:events")
+PROCESS_ID = uuid.uuid4().hex
+
+class DomainEvent(BaseModel):
+    origin: str = PROCESS_ID
+    occurred_at: datetime = Field(default_factory=datetime.utcnow)
+
+class MoviesCreated(DomainEvent):
+    movie_ids: List[int]
+
+class MovieUpdated(DomainEvent):
+    movie_id: int
+
+class MovieDeleted(DomainEvent):
+    movie_id: int
+
+class ReviewsChanged(DomainEvent):
+    movie_ids: List[int]
+    review_ids: List[int] = []
+    action: str
+
+class UserDeleted(DomainEvent):
+    user_id: int
+    movie_ids: List[int]
+
+class MoviesRescored(DomainEvent):
+    movie_ids: List[int]
+
+EVENT_TYPES: Dict[str, Type[DomainEvent]] = {
+    event_type.__name__: event_type
+    for event_type in (MoviesCreated, MovieUpdated, MovieDeleted, ReviewsChanged, UserDeleted, MoviesRescored)
+}
+
+class RedisTransport:
+    name = "redis"
+
+    def __init__(self, url: str, channel: str = CHANNEL):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.channel = channel
+
+    async def send(self, event: DomainEvent):
+        await self.client.publish(self.channel, encode(event))
+
+    async def listen(self, deliver: Callable):
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    await deliver(decode(message["data"]))
+        finally:
+            await pubsub.unsubscribe(self.channel)
+
+def create_transport(url: str = BUS_URL):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTransport(url)
+    return None
+
+def encode(event: DomainEvent) -> str:
+    return json.dumps({"type": type(event).__name__, "event": event.model_dump(mode="json")})
+
+def decode(raw) -> Optional[DomainEvent]:
+    payload = json.loads(raw)
+    event_type = EVENT_TYPES.get(payload.get("type"))
+    if event_type is None:
+        return None
+    return event_type.model_validate(payload["event"])
+
+_subscribers: List[Tuple[Tuple[Type[DomainEvent], ...], Callable, bool]] = []
+_queue: Optional[asyncio.Queue] = None
+_tasks: List[asyncio.Task] = []
+transport = None
+stats = {"published": 0, "delivered": 0, "failed": 0, "dropped": 0, "remote_received": 0, "remote_errors": 0}
+_max_lag_ms = 0.0
+
+def subscribe(handler: Callable, *event_types: Type[DomainEvent], remote_only: bool = False):
+    _subscribers.append((event_types or (DomainEvent,), handler, remote_only))
+
+def handlers_for(event: DomainEvent) -> List[Callable]:
+    remote = event.origin != PROCESS_ID
+    return [
+        handler
+        for event_types, handler, remote_only in _subscribers
+        if isinstance(event, event_types) and (remote or not remote_only)
+    ]
+
+async def enqueue(event: DomainEvent, enqueued_at: float):
+    try:
+        await asyncio.wait_for(_queue.put((event, enqueued_at)), PUBLISH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        stats["dropped"] += 1
+
+async def publish(event: DomainEvent):
+    if _queue is None:
+        return
+    stats["published"] += 1
+    if handlers_for(event) or transport is not None:
+        await enqueue(event, time.monotonic())
+
+async def deliver_remote(event: Optional[DomainEvent]):
+    if event is None or event.origin == PROCESS_ID:
+        return
+    stats["remote_received"] += 1
+    if handlers_for(event):
+        await enqueue(event, time.monotonic())
+
+async def dispatch(queue: asyncio.Queue):
+    global _max_lag_ms
+    while True:
+        event, enqueued_at = await queue.get()
+        try:
+            _max_lag_ms = max(_max_lag_ms, (time.monotonic() - enqueued_at) * 1000)
+            if transport is not None and event.origin == PROCESS_ID:
+                try:
+                    await transport.send(event)
+                except Exception:
+                    stats["remote_errors"] += 1
+            for handler in handlers_for(event):
+                try:
+                    await handler(event)
+                    stats["delivered"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"Ошибка обработки события {type(event).__name__}: {e}")
+        finally:
+            queue.task_done()
+
+async def listen_remote():
+    while True:
+        try:
+            await transport.listen(deliver_remote)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats["remote_errors"] += 1
+            print(f"Ошибка получения событий: {e}")
+        await asyncio.sleep(1)
+
+def start():
+    global _queue, transport
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    transport = create_transport()
+    _tasks.append(asyncio.create_task(dispatch(_queue)))
+    if transport is not None:
+        _tasks.append(asyncio.create_task(listen_remote()))
+
+async def drain():
+    if _queue is not None:
+        await _queue.join()
+
+async def stop():
+    global _queue, transport
+    if _queue is None:
+        return
+    try:
+        await asyncio.wait_for(drain(), PUBLISH_TIMEOUT_SECONDS * 20)
+    except asyncio.TimeoutError:
+        pass
+    for task in _tasks:
+        task.cancel()
+    _tasks.clear()
+    _queue = None
+    transport = None
+
+def metrics() -> dict:
+    return {
+        "transport": transport.name if transport is not None else "local",
+        "queue_size": _queue.qsize() if _queue is not None else 0,
+        "queue_capacity": QUEUE_SIZE,
+        "subscribers": len(_subscribers),
+        "max_lag_ms": round(_max_lag_ms, 3),
+        **stats,
+    }
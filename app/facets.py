@@ -0,0 +1,162 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.database import upsert
+from app.schemas import MovieDB, MovieFacetCountDB
+
+CACHE_TTL_SECONDS = 30
+CACHE_MAX_ENTRIES = 256
+RATING_BANDS = ((8, "8-10"), (6, "6-8"), (4, "4-6"), (2, "2-4"), (0, "0-2"))
+FACETS = ("genre", "year", "rating")
+
+_cache: "OrderedDict[tuple, Tuple[float, models.MovieFacets]]" = OrderedDict()
+
+def genre_tokens(genre: Optional[str]) -> Set[str]:
+    return {token.strip()[:100] for token in (genre or "").split(",") if token.strip()}
+
+def rating_band(rating: Optional[float]) -> str:
+    for lower, label in RATING_BANDS:
+        if (rating or 0.0) >= lower:
+            return label
+    return RATING_BANDS[-1][1]
+
+def facet_values(movie) -> Set[Tuple[str, str]]:
+    if movie is None:
+        return set()
+    values = {("total", ""), ("rating", rating_band(movie.rating))}
+    values.update(("genre", token) for token in genre_tokens(movie.genre))
+    if movie.year is not None:
+        values.add(("year", str(movie.year // 10 * 10)))
+    return values
+
+async def adjust(db: AsyncSession, old: Set[Tuple[str, str]], new: Set[Tuple[str, str]]):
+    deltas = {key: 1 for key in new - old}
+    deltas.update({key: -1 for key in old - new})
+    await apply_deltas(db, deltas)
+
+async def apply_deltas(db: AsyncSession, deltas: Dict[Tuple[str, str], int]):
+    for (facet, value), delta in deltas.items():
+        if not delta:
+            continue
+        await db.execute(
+            upsert(MovieFacetCountDB)
+            .values(facet=facet, value=value, count=max(delta, 0))
+            .on_conflict_do_update(
+                index_elements=[MovieFacetCountDB.facet, MovieFacetCountDB.value],
+                set_={"count": MovieFacetCountDB.count + delta}
+            )
+        )
+
+def decade_expression():
+    return (MovieDB.year // 10) * 10
+
+def rating_band_expression():
+    return case(
+        *[(MovieDB.rating >= lower, label) for lower, label in RATING_BANDS[:-1]],
+        else_=RATING_BANDS[-1][1]
+    )
+
+def filter_conditions(title: Optional[str], genre: Optional[str], min_rating: Optional[float]):
+    conditions = []
+    if genre:
+        conditions.append(MovieDB.genre.contains(genre))
+    if min_rating:
+        conditions.append(MovieDB.rating >= min_rating)
+    if title:
+        conditions.append(MovieDB.title.contains(title))
+    return conditions
+
+def build_facets(total: int, counts: Dict[str, Dict[str, int]]) -> models.MovieFacets:
+    def ordered(facet: str, key):
+        items = [(value, count) for value, count in counts.get(facet, {}).items() if count > 0]
+        return [models.FacetCount(value=value, count=count) for value, count in sorted(items, key=key)]
+
+    return models.MovieFacets(
+        total=total,
+        genre=ordered("genre", lambda item: (-item[1], item[0])),
+        year=ordered("year", lambda item: item[0]),
+        rating=ordered("rating", lambda item: -int(item[0].split("-")[0]))
+    )
+
+async def unfiltered_facets(db: AsyncSession) -> models.MovieFacets:
+    result = await db.execute(select(MovieFacetCountDB.facet, MovieFacetCountDB.value, MovieFacetCountDB.count))
+    counts = {}
+    for facet, value, count in result.all():
+        counts.setdefault(facet, {})[value] = count
+    return build_facets(counts.get("total", {}).get("", 0), counts)
+
+async def filtered_facets(db: AsyncSession, conditions) -> models.MovieFacets:
+    counts = {"genre": {}, "year": {}, "rating": {}}
+
+    total = (await db.execute(select(func.count(MovieDB.id)).where(*conditions))).scalar_one()
+
+    result = await db.execute(
+        select(MovieDB.genre, func.count(MovieDB.id))
+        .where(*conditions, MovieDB.genre.is_not(None))
+        .group_by(MovieDB.genre)
+    )
+    for genre, count in result.all():
+        for token in genre_tokens(genre):
+            counts["genre"][token] = counts["genre"].get(token, 0) + count
+
+    decade = decade_expression()
+    result = await db.execute(
+        select(decade, func.count(MovieDB.id))
+        .where(*conditions, MovieDB.year.is_not(None))
+        .group_by(decade)
+    )
+    counts["year"] = {str(value): count for value, count in result.all()}
+
+    band = rating_band_expression()
+    result = await db.execute(
+        select(band, func.count(MovieDB.id)).where(*conditions).group_by(band)
+    )
+    counts["rating"] = dict(result.all())
+
+    return build_facets(total, counts)
+
+async def get_facets(
+    db: AsyncSession,
+    title: Optional[str] = None,
+    genre: Optional[str] = None,
+    min_rating: Optional[float] = None
+) -> models.MovieFacets:
+    key = (title, genre, min_rating)
+    cached = _cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        _cache.move_to_end(key)
+        return cached[1]
+
+    conditions = filter_conditions(title, genre, min_rating)
+    if conditions:
+        facets = await filtered_facets(db, conditions)
+    else:
+        facets = await unfiltered_facets(db)
+
+    _cache[key] = (time.monotonic() + CACHE_TTL_SECONDS, facets)
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return facets
+
+async def rebuild(db: AsyncSession):
+    await db.execute(delete(MovieFacetCountDB))
+    facets = await filtered_facets(db, [])
+    rows = [{"facet": "total", "value": "", "count": facets.total}]
+    for facet in FACETS:
+        rows.extend(
+            {"facet": facet, "value": item.value, "count": item.count}
+            for item in getattr(facets, facet)
+        )
+    await db.execute(insert(MovieFacetCountDB), rows)
+    await db.commit()
+
+async def rebuild_if_empty(db: AsyncSession):
+    result = await db.execute(select(MovieFacetCountDB.facet).limit(1))
+    if result.first() is None:
+        await rebuild(db)
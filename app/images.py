@@ -0,0 +1,174 @@
+import asyncio
+import os
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from fastapi import Header
+from PIL import Image, ImageOps
+from sqlalchemy import select, update
+
+from app import events, models, movie_cache, response_cache, static_files
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB
+
+RENDITION_SIZES = (200, 600)
+RENDITION_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+UPLOADS_DIR = "static/uploads"
+RENDITIONS_DIR = "static/uploads/renditions"
+DEFAULT_PHOTO = "static/default_movie.jpg"
+MAX_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = set()
+_backfill_task: Optional[asyncio.Task] = None
+
+def rendition_paths(photo_path: str) -> Dict[str, Dict[str, str]]:
+    relative_dir = os.path.relpath(os.path.dirname(photo_path), UPLOADS_DIR)
+    target_dir = os.path.normpath(os.path.join(RENDITIONS_DIR, relative_dir))
+    stem = os.path.splitext(os.path.basename(photo_path))[0]
+    return {
+        str(size): {
+            extension: f"{target_dir}/{stem}_{size}.{extension}"
+            for extension in RENDITION_FORMATS
+        }
+        for size in RENDITION_SIZES
+    }
+
+def render_photo(photo_path: str) -> Dict[str, Dict[str, str]]:
+    renditions = rendition_paths(photo_path)
+
+    with Image.open(photo_path) as source:
+        source = ImageOps.exif_transpose(source).convert("RGB")
+        for size in RENDITION_SIZES:
+            image = source.copy()
+            image.thumbnail((size, size), Image.LANCZOS)
+            for extension, image_format in RENDITION_FORMATS.items():
+                path = renditions[str(size)][extension]
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                image.save(path, image_format, quality=80, optimize=True)
+
+    return renditions
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+async def process_movie_photo(movie_id: int, photo_path: str):
+    loop = asyncio.get_running_loop()
+    try:
+        renditions = await loop.run_in_executor(get_executor(), render_photo, photo_path)
+    except Exception as e:
+        print(f"Ошибка обработки изображения {photo_path}: {e}")
+        await mark_failed(movie_id, photo_path)
+        return
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(MovieDB)
+            .where(MovieDB.id == movie_id, MovieDB.photo_url == photo_path)
+            .values(photo_renditions=renditions)
+        )
+        await session.commit()
+
+    if result.rowcount:
+        await movie_cache.invalidate(movie_id)
+        response_cache.purge(f"movie:{movie_id}", "catalog")
+        await events.publish(events.MovieUpdated(movie_id=movie_id))
+    elif not os.path.exists(photo_path):
+        remove_renditions(photo_path)
+
+async def mark_failed(movie_id: int, photo_path: str):
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(MovieDB)
+            .where(MovieDB.id == movie_id, MovieDB.photo_url == photo_path)
+            .values(photo_render_failed_at=datetime.utcnow(), updated_at=MovieDB.updated_at)
+        )
+        await session.commit()
+
+async def backfill_renditions(batch_size: int = 100):
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(MovieDB.id, MovieDB.photo_url)
+                .where(
+                    MovieDB.id > last_id,
+                    MovieDB.photo_renditions.is_(None),
+                    MovieDB.photo_render_failed_at.is_(None),
+                    MovieDB.photo_url != DEFAULT_PHOTO
+                )
+                .order_by(MovieDB.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+
+        if not rows:
+            return
+
+        for movie_id, photo_url in rows:
+            if photo_url and os.path.exists(photo_url):
+                await process_movie_photo(movie_id, photo_url)
+        last_id = rows[-1].id
+
+def _spawn(coro):
+    task = asyncio.create_task(coro)
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+
+def schedule_renditions(movie_id: int, photo_path: str):
+    _spawn(process_movie_photo(movie_id, photo_path))
+
+def schedule_backfill():
+    global _backfill_task
+    if _backfill_task is None or _backfill_task.done():
+        _backfill_task = asyncio.create_task(backfill_renditions())
+
+def existing_renditions(photo_path: str) -> Optional[Dict[str, Dict[str, str]]]:
+    if photo_path == DEFAULT_PHOTO:
+        return None
+    renditions = rendition_paths(photo_path)
+    for paths in renditions.values():
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+    return renditions
+
+def remove_renditions(photo_path: str):
+    for paths in rendition_paths(photo_path).values():
+        for path in paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+def accepted_format(accept: Optional[str] = Header(None)) -> str:
+    return static_files.accepted_image_format(accept)
+
+def pick_rendition(movie, size: Optional[int], image_format: str = "jpeg") -> Optional[str]:
+    renditions = movie.photo_renditions
+    if not size or not renditions:
+        return movie.photo_url
+
+    fitting = [int(key) for key in renditions if int(key) >= size]
+    if not fitting:
+        return movie.photo_url
+    return renditions[str(min(fitting))].get(image_format, movie.photo_url)
+
+def sized_response(movie, size: Optional[int], image_format: str = "jpeg") -> models.MovieResponse:
+    response = models.MovieResponse.model_validate(movie)
+    if size:
+        response.photo_url = pick_rendition(movie, size, image_format)
+    return response
+
+async def shutdown():
+    global _backfill_task, _executor
+    if _backfill_task is not None:
+        _backfill_task.cancel()
+        await asyncio.gather(_backfill_task, return_exceptions=True)
+        _backfill_task = None
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,216 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app import models
+from app.database import AsyncSessionLocal, upsert
+from app.schemas import JobDB
+
+WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+RECENT_FAILURES = 20
+
+_handlers: Dict[str, Callable] = {}
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+stats = {"completed": 0, "retried": 0, "failed": 0, "deduplicated": 0}
+
+def register(kind: str, handler: Callable):
+    _handlers[kind] = handler
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: dict,
+    idempotency_key: Optional[str] = None,
+    delay_seconds: float = 0
+) -> Optional[int]:
+    result = await db.execute(
+        upsert(JobDB)
+        .values(
+            kind=kind,
+            payload=payload,
+            idempotency_key=idempotency_key,
+            max_attempts=MAX_ATTEMPTS,
+            run_after=datetime.utcnow() + timedelta(seconds=delay_seconds)
+        )
+        .on_conflict_do_nothing()
+        .returning(JobDB.id)
+    )
+    job_id = result.scalar_one_or_none()
+    if job_id is None:
+        stats["deduplicated"] += 1
+    return job_id
+
+def wake():
+    if _wakeup is not None:
+        _wakeup.set()
+
+async def claim(session: AsyncSession) -> Optional[tuple]:
+    now = datetime.utcnow()
+    next_job = (
+        select(JobDB.id)
+        .where(JobDB.status == "pending", JobDB.run_after <= now)
+        .order_by(JobDB.run_after, JobDB.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(JobDB)
+        .where(JobDB.id == next_job, JobDB.status == "pending")
+        .values(status="running", attempts=JobDB.attempts + 1, updated_at=now)
+        .returning(JobDB.id, JobDB.kind, JobDB.payload, JobDB.attempts, JobDB.max_attempts)
+        .execution_options(synchronize_session=False)
+    )
+    job = result.first()
+    await session.commit()
+    return job
+
+async def finish(job_id: int, values: dict):
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(JobDB)
+            .where(JobDB.id == job_id)
+            .values(updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+async def run_job(job):
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"Неизвестный тип задачи: {job.kind}")
+        async with AsyncSessionLocal() as session:
+            await handler(session, job.payload)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:1000]
+        if job.attempts < job.max_attempts:
+            stats["retried"] += 1
+            delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            try:
+                await finish(job.id, {
+                    "status": "pending",
+                    "last_error": error,
+                    "run_after": datetime.utcnow() + timedelta(seconds=delay),
+                })
+            except IntegrityError:
+                stats["deduplicated"] += 1
+                await finish(job.id, {"status": "done", "last_error": error})
+        else:
+            stats["failed"] += 1
+            await finish(job.id, {"status": "failed", "last_error": error})
+            print(f"Задача {job.id} ({job.kind}) завершилась ошибкой: {error}")
+        return
+
+    stats["completed"] += 1
+    await finish(job.id, {"status": "done", "last_error": None})
+
+async def run_pending() -> int:
+    processed = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            job = await claim(session)
+        if job is None:
+            return processed
+        await run_job(job)
+        processed += 1
+
+async def work():
+    while True:
+        try:
+            await run_pending()
+        except Exception as e:
+            print(f"Ошибка обработки очереди задач: {e}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+
+async def recover():
+    newer = aliased(JobDB)
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(JobDB)
+            .where(
+                JobDB.status == "running",
+                JobDB.idempotency_key.is_not(None),
+                select(newer.id)
+                .where(
+                    newer.idempotency_key == JobDB.idempotency_key,
+                    or_(newer.status == "pending", and_(newer.status == "running", newer.id > JobDB.id))
+                )
+                .exists()
+            )
+            .values(status="done")
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            update(JobDB)
+            .where(JobDB.status == "running")
+            .values(status="pending", run_after=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(
+            delete(JobDB)
+            .where(JobDB.status == "done", JobDB.updated_at < datetime.utcnow() - timedelta(hours=RETENTION_HOURS))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+async def start(workers: int = WORKERS):
+    global _wakeup
+    if _workers:
+        return
+    await recover()
+    _wakeup = asyncio.Event()
+    for _ in range(workers):
+        _workers.append(asyncio.create_task(work()))
+
+async def stop():
+    global _wakeup
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _wakeup = None
+
+async def status(db: AsyncSession) -> models.JobQueueStats:
+    result = await db.execute(
+        select(JobDB.kind, JobDB.status, func.count(JobDB.id)).group_by(JobDB.kind, JobDB.status)
+    )
+    by_status: Dict[str, int] = {}
+    by_kind: Dict[str, Dict[str, int]] = {}
+    for kind, job_status, count in result.all():
+        by_status[job_status] = by_status.get(job_status, 0) + count
+        by_kind.setdefault(kind, {})[job_status] = count
+
+    oldest_pending = await db.scalar(
+        select(func.min(JobDB.run_after)).where(JobDB.status == "pending")
+    )
+    result = await db.execute(
+        select(JobDB)
+        .where(JobDB.status == "failed")
+        .order_by(JobDB.updated_at.desc(), JobDB.id.desc())
+        .limit(RECENT_FAILURES)
+    )
+    return models.JobQueueStats(
+        workers=len(_workers),
+        by_status=by_status,
+        by_kind=by_kind,
+        oldest_pending_seconds=(
+            max((datetime.utcnow() - oldest_pending).total_seconds(), 0.0) if oldest_pending else None
+        ),
+        recent_failures=result.scalars().all(),
+        **stats
+    )
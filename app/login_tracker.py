@@ -0,0 +1,88 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, update
+
+from app import models
+from app.database import AsyncSessionLocal
+from app.schemas import UserDB
+
+FLUSH_INTERVAL_SECONDS = float(os.getenv("LAST_LOGIN_FLUSH_SECONDS", "5"))
+
+users_table = UserDB.__table__
+update_last_login = (
+    update(users_table)
+    .where(users_table.c.id == bindparam("user_id"))
+    .values(last_login=bindparam("login_at"))
+)
+
+_pending: Dict[int, datetime] = {}
+_periodic_task = None
+stats = {"recorded": 0, "flushed": 0, "batches": 0, "errors": 0}
+
+def record(user_id: int, login_at: Optional[datetime] = None):
+    _pending[user_id] = login_at or datetime.utcnow()
+    stats["recorded"] += 1
+
+def discard(user_id: int):
+    _pending.pop(user_id, None)
+
+def pending(user_id: int) -> Optional[datetime]:
+    return _pending.get(user_id)
+
+def user_response(user: UserDB) -> models.UserResponse:
+    response = models.UserResponse.model_validate(user)
+    login_at = pending(user.id)
+    if login_at is not None:
+        response.last_login = login_at
+    return response
+
+async def flush() -> int:
+    if not _pending:
+        return 0
+
+    batch = dict(_pending)
+    _pending.clear()
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update_last_login,
+                [{"user_id": user_id, "login_at": login_at} for user_id, login_at in batch.items()]
+            )
+            await session.commit()
+    except BaseException:
+        stats["errors"] += 1
+        for user_id, login_at in batch.items():
+            if _pending.get(user_id, login_at) <= login_at:
+                _pending[user_id] = login_at
+        raise
+
+    stats["flushed"] += len(batch)
+    stats["batches"] += 1
+    return len(batch)
+
+async def run_periodically(interval_seconds: float = FLUSH_INTERVAL_SECONDS):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await flush()
+        except Exception as e:
+            print(f"Ошибка сохранения времени входа: {e}")
+
+def start_periodic():
+    global _periodic_task
+    if _periodic_task is None:
+        _periodic_task = asyncio.create_task(run_periodically())
+
+async def stop_periodic():
+    global _periodic_task
+    if _periodic_task is not None:
+        _periodic_task.cancel()
+        await asyncio.gather(_periodic_task, return_exceptions=True)
+        _periodic_task = None
+    try:
+        await flush()
+    except Exception as e:
+        print(f"Ошибка сохранения времени входа: {e}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class MovieBase(BaseModel):
@@ -27,16 +27,54 @@ class MovieUpdate(BaseModel):
     cost: Optional[float] = Field(None, ge=0.0)
     is_recommended: Optional[bool] = None
 
+class ReviewSummary(BaseModel):
+    review_count: int = 0
+    histogram: Dict[int, int] = Field(default_factory=lambda: {rating: 0 for rating in range(1, 6)})
+    latest_review_ids: List[int] = []
+    latest_snippet: Optional[str] = None
+
 class MovieResponse(MovieBase):
     id: int
     photo_url: Optional[str]
+    photo_renditions: Optional[Dict[str, Dict[str, str]]] = None
     created_at: datetime
     updated_at: datetime
     added_by: Optional[int]
+    weighted_score: Optional[float] = None
+    review_summary: Optional[ReviewSummary] = None
     
     class Config:
         from_attributes = True
 
+class TrendingMovieResponse(MovieResponse):
+    trending_score: float
+    trending_review_count: int
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class MovieFacets(BaseModel):
+    total: int
+    genre: List[FacetCount]
+    year: List[FacetCount]
+    rating: List[FacetCount]
+
+class MovieChanges(BaseModel):
+    upserted: List[MovieResponse]
+    deleted: List[int]
+    next_cursor: Optional[str]
+    has_more: bool
+
+class MovieCacheStats(BaseModel):
+    backend: str
+    entries: Optional[int]
+    hit_rate: float
+    hits: int
+    misses: int
+    invalidations: int
+    errors: int
+
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
     email: EmailStr
@@ -89,6 +127,73 @@ class ReviewWithUserResponse(ReviewResponse):
     class Config:
         from_attributes = True
 
+class EventBusStats(BaseModel):
+    transport: str
+    queue_size: int
+    queue_capacity: int
+    subscribers: int
+    max_lag_ms: float
+    published: int
+    delivered: int
+    failed: int
+    dropped: int
+    remote_received: int
+    remote_errors: int
+
+class JobInfo(BaseModel):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    idempotency_key: Optional[str]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class JobQueueStats(BaseModel):
+    workers: int
+    by_status: Dict[str, int]
+    by_kind: Dict[str, Dict[str, int]]
+    oldest_pending_seconds: Optional[float]
+    completed: int
+    retried: int
+    failed: int
+    deduplicated: int
+    recent_failures: List[JobInfo]
+
+class ReviewBulkDelete(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    user_id: Optional[int] = None
+    movie_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    comment_contains: Optional[str] = Field(None, min_length=1, max_length=200)
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkCreateResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+class BulkDeleteResult(BaseModel):
+    deleted: int
+    movies_updated: int
+
+class MovieReviewsPreview(BaseModel):
+    movie_id: int
+    total: int
+    reviews: List[ReviewWithUserResponse]
+
 class ReviewWithDetailsResponse(ReviewResponse):
     username: str
     user_email: Optional[str]
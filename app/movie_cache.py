@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+TTL_SECONDS = int(os.getenv("MOVIE_CACHE_TTL_SECONDS", "60"))
+MAX_ENTRIES = int(os.getenv("MOVIE_CACHE_MAX_ENTRIES", "1024"))
+MAX_GENERATIONS = int(os.getenv("MOVIE_CACHE_MAX_GENERATIONS", "10000"))
+GENERATION_TTL_SECONDS = int(os.getenv("MOVIE_CACHE_GENERATION_TTL_SECONDS", "86400"))
+CACHE_URL = os.getenv("MOVIE_CACHE_URL", "")
+KEY_PREFIX = "movie:"
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_generations: int = MAX_GENERATIONS):
+        self.max_entries = max_entries
+        self.max_generations = max_generations
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.generations: "OrderedDict[str, int]" = OrderedDict()
+        self.last_generation = 0
+        self.evicted_generation = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def generation(self, key: str) -> int:
+        return self.generations.get(key, self.evicted_generation)
+
+    async def set(self, key: str, value: dict, ttl: int, loaded_generation: int):
+        if await self.generation(key) != loaded_generation:
+            return
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def invalidate(self, key: str):
+        self.last_generation += 1
+        self.generations[key] = self.last_generation
+        self.generations.move_to_end(key)
+        while len(self.generations) > self.max_generations:
+            _, evicted = self.generations.popitem(last=False)
+            self.evicted_generation = max(self.evicted_generation, evicted)
+        self.entries.pop(key, None)
+
+    def size(self) -> Optional[int]:
+        return len(self.entries)
+
+class RedisBackend:
+    name = "redis"
+    SET_IF_GENERATION = """
+        if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+            redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+        end
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.set_if_generation = self.client.register_script(self.SET_IF_GENERATION)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def generation(self, key: str) -> int:
+        return int(await self.client.get(generation_key(key)) or 0)
+
+    async def set(self, key: str, value: dict, ttl: int, loaded_generation: int):
+        await self.set_if_generation(
+            keys=[key, generation_key(key)],
+            args=[loaded_generation, json.dumps(value), ttl]
+        )
+
+    async def invalidate(self, key: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(generation_key(key))
+            pipe.expire(generation_key(key), GENERATION_TTL_SECONDS)
+            pipe.delete(key)
+            await pipe.execute()
+
+    def size(self) -> Optional[int]:
+        return None
+
+def create_backend(url: str = CACHE_URL):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    return MemoryBackend()
+
+backend = create_backend()
+stats = {"hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+
+def configure(new_backend):
+    global backend
+    backend = new_backend
+
+def cache_key(movie_id: int) -> str:
+    return f"{KEY_PREFIX}{movie_id}"
+
+def generation_key(key: str) -> str:
+    return f"{key}:generation"
+
+async def generation(movie_id: int) -> Optional[int]:
+    try:
+        return await backend.generation(cache_key(movie_id))
+    except Exception:
+        stats["errors"] += 1
+        return None
+
+async def get(movie_id: int) -> Optional[dict]:
+    try:
+        value = await backend.get(cache_key(movie_id))
+    except Exception:
+        stats["errors"] += 1
+        value = None
+    stats["hits" if value is not None else "misses"] += 1
+    return value
+
+async def put(movie_id: int, value: dict, loaded_generation: Optional[int]):
+    if loaded_generation is None:
+        return
+    try:
+        await backend.set(cache_key(movie_id), value, TTL_SECONDS, loaded_generation)
+    except Exception:
+        stats["errors"] += 1
+
+async def invalidate(movie_id: int):
+    stats["invalidations"] += 1
+    try:
+        await backend.invalidate(cache_key(movie_id))
+    except Exception:
+        stats["errors"] += 1
+
+def metrics() -> dict:
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        "backend": backend.name,
+        "entries": backend.size(),
+        "hit_rate": stats["hits"] / lookups if lookups else 0.0,
+        **stats,
+    }
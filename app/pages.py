@@ -0,0 +1,71 @@
+import gzip
+import hashlib
+import os
+from typing import Dict
+
+import brotli
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from app.static_files import accepted_encodings, etag_matches
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+PAGES = {
+    "home": "home.html",
+    "register": "register.html",
+    "login": "login.html",
+    "my_movies": "my_movies.html",
+    "movies": "movies.html",
+    "admin_panel": "admin_panel.html",
+    "my_reviews": "my_reviews.html",
+}
+
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=select_autoescape(["html"])
+)
+
+class CompiledPage:
+    def __init__(self, body: bytes):
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {
+            "br": brotli.compress(body, quality=11, mode=brotli.MODE_TEXT),
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+            "identity": body,
+        }
+        self.etags = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.variants
+        }
+
+_compiled: Dict[str, CompiledPage] = {}
+
+def compile_page(name: str, template: str, **context) -> CompiledPage:
+    body = environment.get_template(template).render(**context).encode("utf-8")
+    _compiled[name] = CompiledPage(body)
+    return _compiled[name]
+
+def compile_pages():
+    for name, template in PAGES.items():
+        compile_page(name, template)
+
+def page_response(request: Request, name: str) -> Response:
+    page = _compiled.get(name) or compile_page(name, PAGES[name])
+
+    accepted = accepted_encodings(request.headers)
+    encoding = next((item for item in ("br", "gzip") if item in accepted), "identity")
+    headers = {
+        "etag": page.etags[encoding],
+        "cache-control": "no-cache",
+        "vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["content-encoding"] = encoding
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, headers["etag"]):
+        headers.pop("content-encoding", None)
+        return Response(status_code=304, headers=headers)
+
+    return HTMLResponse(page.variants[encoding], headers=headers)
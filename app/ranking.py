@@ -0,0 +1,160 @@
+import asyncio
+import os
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import events, movie_cache, response_cache
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB, MovieReviewSummaryDB, ReviewRatingTotalsDB
+
+PRIOR_REVIEWS = float(os.getenv("BAYES_PRIOR_REVIEWS", "10"))
+EMPTY_MEAN = 5.0
+RESCORE_MINUTES = float(os.getenv("WEIGHTED_RESCORE_MINUTES", "10"))
+RESCORE_THRESHOLD = float(os.getenv("WEIGHTED_RESCORE_THRESHOLD", "0.01"))
+RESCORE_BATCH_SIZE = 500
+TOTALS_ID = 1
+
+_periodic_task = None
+stats = {"rescored_movies": 0, "full_rescores": 0}
+
+def histogram_sum():
+    return sum(getattr(MovieReviewSummaryDB, f"rating_{rating}") * rating for rating in range(1, 6))
+
+async def summary_totals(db: AsyncSession, movie_ids: Optional[List[int]] = None) -> tuple:
+    query = select(
+        func.coalesce(func.sum(MovieReviewSummaryDB.review_count), 0),
+        func.coalesce(func.sum(histogram_sum()), 0)
+    )
+    if movie_ids is not None:
+        query = query.where(MovieReviewSummaryDB.movie_id.in_(movie_ids))
+    row = (await db.execute(query)).one()
+    return row[0], row[1]
+
+async def apply_totals(db: AsyncSession, count_delta: int, rating_delta: int):
+    if not count_delta and not rating_delta:
+        return
+    await db.execute(
+        update(ReviewRatingTotalsDB)
+        .where(ReviewRatingTotalsDB.id == TOTALS_ID)
+        .values(
+            review_count=ReviewRatingTotalsDB.review_count + count_delta,
+            rating_sum=ReviewRatingTotalsDB.rating_sum + rating_delta
+        )
+    )
+
+async def reconcile_totals(db: AsyncSession):
+    review_count, rating_sum = await summary_totals(db)
+    result = await db.execute(
+        update(ReviewRatingTotalsDB)
+        .where(ReviewRatingTotalsDB.id == TOTALS_ID)
+        .values(review_count=review_count, rating_sum=rating_sum)
+    )
+    if result.rowcount == 0:
+        await db.execute(
+            insert(ReviewRatingTotalsDB).values(id=TOTALS_ID, review_count=review_count, rating_sum=rating_sum)
+        )
+    await db.commit()
+
+async def global_mean(db: AsyncSession) -> float:
+    totals = (await db.execute(
+        select(ReviewRatingTotalsDB.review_count, ReviewRatingTotalsDB.rating_sum)
+        .where(ReviewRatingTotalsDB.id == TOTALS_ID)
+    )).first()
+    if totals is None or totals.review_count <= 0:
+        return EMPTY_MEAN
+    return totals.rating_sum * 2 / totals.review_count
+
+def weighted_score(review_count: int, rating: Optional[float], mean: float) -> float:
+    return (review_count * (rating or 0.0) + PRIOR_REVIEWS * mean) / (review_count + PRIOR_REVIEWS)
+
+def weighted_score_expression(mean: float):
+    review_count = func.coalesce(
+        select(MovieReviewSummaryDB.review_count)
+        .where(MovieReviewSummaryDB.movie_id == MovieDB.id)
+        .scalar_subquery(),
+        0
+    )
+    return (review_count * func.coalesce(MovieDB.rating, 0.0) + PRIOR_REVIEWS * mean) / (review_count + PRIOR_REVIEWS)
+
+async def rescore(db: AsyncSession, movie_ids: Iterable[int], mean: Optional[float] = None) -> List[int]:
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return []
+    if mean is None:
+        mean = await global_mean(db)
+    score = weighted_score_expression(mean)
+    result = await db.execute(
+        update(MovieDB)
+        .where(MovieDB.id.in_(movie_ids), MovieDB.weighted_score.is_distinct_from(score))
+        .values(weighted_score=score)
+        .returning(MovieDB.id)
+        .execution_options(synchronize_session=False)
+    )
+    changed = result.scalars().all()
+    stats["rescored_movies"] += len(changed)
+    return changed
+
+async def invalidate(movie_ids: List[int]):
+    for movie_id in movie_ids:
+        await movie_cache.invalidate(movie_id)
+    response_cache.purge(*[f"movie:{movie_id}" for movie_id in movie_ids])
+    await events.publish(events.MoviesRescored(movie_ids=movie_ids))
+
+async def rescore_all(db: AsyncSession, batch_size: int = RESCORE_BATCH_SIZE) -> float:
+    mean = await global_mean(db)
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(MovieDB.id).where(MovieDB.id > last_id).order_by(MovieDB.id).limit(batch_size)
+        )
+        movie_ids = result.scalars().all()
+        if not movie_ids:
+            break
+        changed = await rescore(db, movie_ids, mean)
+        await db.commit()
+        if changed:
+            await invalidate(changed)
+        last_id = movie_ids[-1]
+    stats["full_rescores"] += 1
+    response_cache.purge("catalog")
+    return mean
+
+async def scored_mean(db: AsyncSession) -> Optional[float]:
+    return await db.scalar(select(ReviewRatingTotalsDB.scored_mean).where(ReviewRatingTotalsDB.id == TOTALS_ID))
+
+async def rescore_if_drifted(db: AsyncSession) -> bool:
+    mean = await global_mean(db)
+    previous = await scored_mean(db)
+    if previous is not None and abs(mean - previous) < RESCORE_THRESHOLD:
+        return False
+    mean = await rescore_all(db)
+    await db.execute(
+        update(ReviewRatingTotalsDB)
+        .where(ReviewRatingTotalsDB.id == TOTALS_ID)
+        .values(scored_mean=mean)
+    )
+    await db.commit()
+    return True
+
+async def run_periodically(interval_minutes: float = RESCORE_MINUTES):
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await rescore_if_drifted(session)
+        except Exception as e:
+            print(f"Ошибка пересчета взвешенного рейтинга: {e}")
+        await asyncio.sleep(interval_minutes * 60)
+
+def start_periodic():
+    global _periodic_task
+    if RESCORE_MINUTES > 0 and _periodic_task is None:
+        _periodic_task = asyncio.create_task(run_periodically())
+
+async def stop_periodic():
+    global _periodic_task
+    if _periodic_task is not None:
+        _periodic_task.cancel()
+        await asyncio.gather(_periodic_task, return_exceptions=True)
+        _periodic_task = None
@@ -0,0 +1,181 @@
+import gzip
+import os
+import re
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Set
+
+import brotli
+from starlette.datastructures import Headers
+from starlette.requests import Request
+
+from app import conditional
+from app.coalescing import normalized_query
+from app.static_files import accepted_encodings, accepted_image_format
+
+TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+MAX_ENTRY_BYTES = MAX_BYTES // 8
+MIN_COMPRESS_BYTES = 1024
+CACHED_ROUTES = (
+    (re.compile(r"^/movies/$"), ("catalog",)),
+    (re.compile(r"^/movies/(\d+)$"), ("movie:{0}",)),
+    (re.compile(r"^/movies/(\d+)/reviews$"), ("movie:{0}",)),
+    (re.compile(r"^/reviews/$"), ("catalog",)),
+    (re.compile(r"^/movies/trending$"), ("catalog", "trending")),
+)
+SKIPPED_HEADERS = {b"content-length", b"content-encoding", b"etag", b"vary"}
+
+class CachedResponse:
+    def __init__(self, status: int, headers: List[tuple], body: bytes, tags: Set[str]):
+        self.status = status
+        self.headers = [(name, value) for name, value in headers if name.lower() not in SKIPPED_HEADERS]
+        self.tags = tags
+        self.expires_at = time.monotonic() + TTL_SECONDS
+
+        response_headers = Headers(raw=headers)
+        self.etag = response_headers.get("etag")
+        last_modified = response_headers.get("last-modified")
+        self.last_modified = parsedate_to_datetime(last_modified) if last_modified else None
+
+        self.variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants["br"] = brotli.compress(body, quality=5, mode=brotli.MODE_TEXT)
+            self.variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+        self.size = sum(len(variant) for variant in self.variants.values())
+
+    def variant_etag(self, encoding: str) -> Optional[str]:
+        if self.etag is None or encoding == "identity":
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+_entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+_tags: Dict[str, Set[tuple]] = {}
+_size = 0
+_generation = 0
+stats = {"hits": 0, "misses": 0, "purged": 0, "evicted": 0}
+
+def cache_tags(scope) -> Optional[Set[str]]:
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None
+    if any(name == b"authorization" for name, _ in scope["headers"]):
+        return None
+    for pattern, templates in CACHED_ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            return {template.format(*match.groups()) for template in templates}
+    return None
+
+def lookup(key: tuple) -> Optional[CachedResponse]:
+    entry = _entries.get(key)
+    if entry is None:
+        return None
+    if entry.expires_at <= time.monotonic():
+        remove(key)
+        return None
+    _entries.move_to_end(key)
+    return entry
+
+def store(key: tuple, entry: CachedResponse):
+    global _size
+    if entry.size > MAX_ENTRY_BYTES:
+        return
+    remove(key)
+    _entries[key] = entry
+    _size += entry.size
+    for tag in entry.tags:
+        _tags.setdefault(tag, set()).add(key)
+    while _size > MAX_BYTES and _entries:
+        remove(next(iter(_entries)))
+        stats["evicted"] += 1
+
+def remove(key: tuple):
+    global _size
+    entry = _entries.pop(key, None)
+    if entry is None:
+        return
+    _size -= entry.size
+    for tag in entry.tags:
+        keys = _tags.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _tags[tag]
+
+def purge(*tags: str):
+    global _generation
+    _generation += 1
+    for tag in tags:
+        for key in list(_tags.get(tag, ())):
+            remove(key)
+            stats["purged"] += 1
+
+def clear():
+    purge(*list(_tags))
+
+async def send_entry(entry: CachedResponse, scope, send, cache_status: str):
+    accepted = accepted_encodings(Headers(scope=scope))
+    encoding = next((item for item in ("br", "gzip") if item in accepted and item in entry.variants), "identity")
+    etag = entry.variant_etag(encoding)
+
+    headers = list(entry.headers)
+    headers.append((b"vary", b"Accept, Accept-Encoding"))
+    headers.append((b"x-cache", cache_status.encode()))
+    if etag is not None:
+        headers.append((b"etag", etag.encode()))
+        if conditional.is_not_modified(Request(scope), etag, entry.last_modified):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+    body = entry.variants[encoding]
+    if encoding != "identity":
+        headers.append((b"content-encoding", encoding.encode()))
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+class ResponseCacheMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        tags = cache_tags(scope)
+        if tags is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = (
+            scope["path"],
+            normalized_query(scope["query_string"]),
+            accepted_image_format(Headers(scope=scope).get("accept")),
+        )
+        entry = lookup(key)
+        if entry is not None:
+            stats["hits"] += 1
+            await send_entry(entry, scope, send, "HIT")
+            return
+
+        stats["misses"] += 1
+        generation = _generation
+        messages = []
+        body = []
+
+        async def capture(message):
+            messages.append(message)
+            if message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+
+        start = messages[0] if messages else None
+        if start is None or start["status"] != 200:
+            for message in messages:
+                await send(message)
+            return
+
+        entry = CachedResponse(start["status"], start.get("headers", []), b"".join(body), tags)
+        if generation == _generation:
+            store(key, entry)
+        await send_entry(entry, scope, send, "MISS")
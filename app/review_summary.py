@@ -0,0 +1,137 @@
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, ranking
+from app.schemas import MovieReviewSummaryDB, ReviewDB
+
+LATEST_REVIEWS = 3
+SNIPPET_LENGTH = 200
+REBUILD_BATCH_SIZE = 500
+INCLUDE_OPTIONS = {"review_summary"}
+
+def parse_include(include: Optional[str]) -> Set[str]:
+    includes = {item.strip() for item in (include or "").split(",") if item.strip()}
+    unknown = includes - INCLUDE_OPTIONS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Неизвестные значения include: {', '.join(sorted(unknown))}"
+        )
+    return includes
+
+def histogram_column(rating: int):
+    return getattr(MovieReviewSummaryDB, f"rating_{rating}")
+
+async def latest_reviews(db: AsyncSession, movie_id: int) -> dict:
+    result = await db.execute(
+        select(ReviewDB.id, ReviewDB.comment)
+        .where(ReviewDB.movie_id == movie_id)
+        .order_by(ReviewDB.created_at.desc(), ReviewDB.id.desc())
+        .limit(LATEST_REVIEWS)
+    )
+    rows = result.all()
+    snippet = rows[0].comment if rows else None
+    return {
+        "latest_review_ids": [row.id for row in rows],
+        "latest_snippet": snippet[:SNIPPET_LENGTH] if snippet else None,
+    }
+
+async def apply_changes(db: AsyncSession, movie_id: int, rating_deltas: Dict[int, int]):
+    await db.flush()
+    values = await latest_reviews(db, movie_id)
+    values["review_count"] = MovieReviewSummaryDB.review_count + sum(rating_deltas.values())
+    for rating, delta in rating_deltas.items():
+        if delta:
+            values[f"rating_{rating}"] = histogram_column(rating) + delta
+
+    result = await db.execute(
+        update(MovieReviewSummaryDB)
+        .where(MovieReviewSummaryDB.movie_id == movie_id)
+        .values(**values)
+    )
+    if result.rowcount == 0:
+        await rebuild(db, [movie_id])
+        return
+    await ranking.apply_totals(
+        db,
+        sum(rating_deltas.values()),
+        sum(rating * delta for rating, delta in rating_deltas.items())
+    )
+
+async def on_review_created(db: AsyncSession, review: ReviewDB):
+    await apply_changes(db, review.movie_id, {review.rating: 1})
+
+async def on_review_updated(db: AsyncSession, review: ReviewDB, old_rating: int):
+    deltas = {}
+    if review.rating != old_rating:
+        deltas = {old_rating: -1, review.rating: 1}
+    await apply_changes(db, review.movie_id, deltas)
+
+async def on_review_deleted(db: AsyncSession, review: ReviewDB):
+    await apply_changes(db, review.movie_id, {review.rating: -1})
+
+async def rebuild(db: AsyncSession, movie_ids: Iterable[int]):
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return
+
+    old_count, old_sum = await ranking.summary_totals(db, movie_ids)
+    await db.execute(
+        delete(MovieReviewSummaryDB).where(MovieReviewSummaryDB.movie_id.in_(movie_ids))
+    )
+    result = await db.execute(
+        select(
+            ReviewDB.movie_id,
+            func.count().label("review_count"),
+            *[
+                func.sum(case((ReviewDB.rating == rating, 1), else_=0)).label(f"rating_{rating}")
+                for rating in range(1, 6)
+            ]
+        )
+        .where(ReviewDB.movie_id.in_(movie_ids))
+        .group_by(ReviewDB.movie_id)
+    )
+    rows = []
+    for row in result.mappings():
+        values = dict(row)
+        values.update(await latest_reviews(db, row["movie_id"]))
+        rows.append(values)
+
+    if rows:
+        await db.execute(insert(MovieReviewSummaryDB), rows)
+    await ranking.apply_totals(
+        db,
+        sum(row["review_count"] for row in rows) - old_count,
+        sum(row[f"rating_{rating}"] * rating for row in rows for rating in range(1, 6)) - old_sum
+    )
+
+async def on_movie_deleted(db: AsyncSession, movie_id: int):
+    review_count, rating_sum = await ranking.summary_totals(db, [movie_id])
+    await ranking.apply_totals(db, -review_count, -rating_sum)
+
+async def rebuild_missing(db: AsyncSession):
+    while True:
+        result = await db.execute(
+            select(ReviewDB.movie_id)
+            .where(ReviewDB.movie_id.not_in(select(MovieReviewSummaryDB.movie_id)))
+            .group_by(ReviewDB.movie_id)
+            .limit(REBUILD_BATCH_SIZE)
+        )
+        movie_ids = result.scalars().all()
+        if not movie_ids:
+            return
+        await rebuild(db, movie_ids)
+        await db.commit()
+
+def to_model(summary: Optional[MovieReviewSummaryDB]) -> models.ReviewSummary:
+    if summary is None:
+        return models.ReviewSummary()
+    return models.ReviewSummary(
+        review_count=summary.review_count,
+        histogram={rating: getattr(summary, f"rating_{rating}") for rating in range(1, 6)},
+        latest_review_ids=summary.latest_review_ids or [],
+        latest_snippet=summary.latest_snippet
+    )
@@ -1,26 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
-from typing import List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from typing import Any, List, Optional
+from datetime import datetime
+from functools import lru_cache
+import os
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app import models, auth, crud
+from app import models, auth, changes, crud, images
 from app.database import get_db
-from app.schemas import MovieDB, ReviewDB, UserDB
-from sqlalchemy.orm import selectinload
+from app.schemas import MovieDB
 
 router = APIRouter()
 
+FAST_JSON_ROWS = os.getenv("FAST_JSON_ROWS", "0") == "1"
+
+@lru_cache(maxsize=None)
+def rows_adapter(model) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def json_rows(rows: List[dict], model) -> ORJSONResponse:
+    if not FAST_JSON_ROWS:
+        adapter = rows_adapter(model)
+        rows = adapter.dump_python(adapter.validate_python(rows), mode="json")
+    return ORJSONResponse(rows)
+
 @router.get("/user/movies/", 
            response_model=List[models.MovieResponse],
            summary="Получить фильмы пользователя",
            description="Возвращает список всех фильмов, добавленных текущим авторизованным пользователем.")
 async def read_user_movies(
+    size: Optional[int] = Query(None, ge=1),
+    image_format: str = Depends(images.accepted_format),
     current_user = Depends(auth.get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
         select(MovieDB).where(MovieDB.added_by == current_user.id)
     )
-    return result.scalars().all()
+    return [images.sized_response(movie, size, image_format) for movie in result.scalars().all()]
 
 @router.post("/user/movies/", 
             response_model=models.MovieResponse,
@@ -54,6 +72,28 @@ async def create_user_movie(
     
     return await crud.create_movie(db, movie_data, current_user.id, photo)
 
+@router.post("/user/movies/bulk",
+            response_model=models.BulkCreateResult,
+            summary="Добавить несколько фильмов",
+            description="Принимает JSON-массив фильмов (не более 500) и добавляет корректные одним запросом в одной транзакции. Для каждого элемента возвращается id созданного фильма или текст ошибки.")
+async def bulk_create_user_movies(
+    items: List[Any] = Body(...),
+    current_user = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await crud.bulk_create_movies(db, items, current_user.id)
+
+@router.post("/reviews/bulk",
+            response_model=models.BulkCreateResult,
+            summary="Оставить несколько отзывов",
+            description="Принимает JSON-массив отзывов (не более 500), добавляет корректные одним запросом и один раз пересчитывает рейтинг каждого затронутого фильма. Для каждого элемента возвращается id отзыва или текст ошибки.")
+async def bulk_create_reviews(
+    items: List[Any] = Body(...),
+    current_user = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await crud.bulk_create_reviews(db, items, current_user.id)
+
 @router.put("/user/movies/{movie_id}", 
            response_model=models.MovieResponse,
            summary="Обновить фильм",
@@ -73,7 +113,7 @@ async def update_user_movie(
     current_user = Depends(auth.get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    movie = await crud.get_movie(db, movie_id)
+    movie = await crud.get_movie_snapshot(db, movie_id)
     if movie.added_by != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -102,7 +142,7 @@ async def delete_user_movie(
     current_user = Depends(auth.get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    movie = await crud.get_movie(db, movie_id)
+    movie = await crud.get_movie_snapshot(db, movie_id)
     if movie.added_by != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -118,17 +158,24 @@ async def delete_user_movie(
 async def get_recommendations(
     current_user = Depends(auth.get_current_user),
     limit: int = Query(10, ge=1, le=50),
+    size: Optional[int] = Query(None, ge=1),
+    image_format: str = Depends(images.accepted_format),
+    fields: Optional[str] = Query(None, description=crud.MOVIE_FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db)
 ):
+    selected_fields = crud.parse_movie_fields(fields)
+    query = select(*crud.movie_columns(selected_fields, size)) if selected_fields else select(MovieDB)
     result = await db.execute(
-        select(MovieDB)
+        query
         .where(MovieDB.added_by != current_user.id)
         .where(MovieDB.rating >= 7.0)
-        .order_by(MovieDB.rating.desc())
+        .order_by(MovieDB.weighted_score.desc(), MovieDB.id.desc())
         .limit(limit)
     )
     
-    return result.scalars().all()
+    if selected_fields:
+        return ORJSONResponse(crud.project_movie_rows(result.all(), selected_fields, size, image_format))
+    return [images.sized_response(movie, size, image_format) for movie in result.scalars().all()]
 
 @router.put("/reviews/{review_id}", 
            response_model=models.ReviewResponse,
@@ -166,43 +213,45 @@ async def delete_user_review(
     
     return await crud.delete_review(db, review_id)
 
+def reviews_page(rows: List[dict], limit: int) -> ORJSONResponse:
+    response = json_rows(rows, models.ReviewWithDetailsResponse)
+    if len(rows) == limit:
+        response.headers["x-next-cursor"] = changes.encode_cursor((rows[-1]["created_at"], rows[-1]["id"]))
+    return response
+
 @router.get("/admin/reviews-with-details/", 
            response_model=List[models.ReviewWithDetailsResponse],
+           response_class=ORJSONResponse,
            summary="Получить все отзывы с деталями (админ)",
-           description="Возвращает все отзывы с детальной информацией о фильмах и пользователях. Только для администраторов.")
+           description="Возвращает отзывы с детальной информацией о фильмах и пользователях, от новых к старым. Следующая страница - параметр cursor из заголовка X-Next-Cursor; skip вместе с cursor не принимается. Только для администраторов.")
 async def get_all_reviews_with_details_admin(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Значение заголовка X-Next-Cursor предыдущей страницы"),
+    movie_id: Optional[int] = Query(None),
+    user_id: Optional[int] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="Отзывы, созданные не раньше этой даты"),
+    created_to: Optional[datetime] = Query(None, description="Отзывы, созданные раньше этой даты"),
     current_user = Depends(auth.get_current_admin_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(ReviewDB)
-        .options(selectinload(ReviewDB.user), selectinload(ReviewDB.movie))
-        .order_by(ReviewDB.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-    
-    reviews = result.scalars().all()
-    
-    reviews_data = []
-    for review in reviews:
-        review_response = models.ReviewWithDetailsResponse(
-            id=review.id,
-            movie_id=review.movie_id,
-            user_id=review.user_id,
-            rating=review.rating,
-            comment=review.comment,
-            created_at=review.created_at,
-            username=review.user.username if review.user else "Неизвестный",
-            user_email=review.user.email if review.user else None,
-            movie_title=review.movie.title if review.movie else "Неизвестный фильм",
-            movie_director=review.movie.director if review.movie else "Неизвестный режиссер"
+    if skip and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Параметры skip и cursor нельзя использовать вместе"
         )
-        reviews_data.append(review_response)
     
-    return reviews_data
+    rows = await crud.get_reviews_with_details(
+        db,
+        user_id=user_id,
+        movie_id=movie_id,
+        created_from=changes.naive_utc(created_from),
+        created_to=changes.naive_utc(created_to),
+        before=changes.decode_cursor(cursor, "cursor"),
+        skip=skip,
+        limit=limit
+    )
+    return reviews_page(rows, limit)
 
 @router.delete("/admin/reviews/{review_id}",
               summary="Удалить любой отзыв (админ)",
@@ -214,71 +263,93 @@ async def admin_delete_review(
 ):
     return await crud.delete_review(db, review_id)
 
+@router.post("/admin/reviews/bulk-delete",
+            response_model=models.BulkDeleteResult,
+            summary="Массовое удаление отзывов (админ)",
+            description="Удаляет отзывы по списку ids и/или по фильтру (user_id, movie_id, created_from/created_to, comment_contains) одним запросом и один раз пересчитывает рейтинг каждого затронутого фильма. Только для администраторов.")
+async def admin_bulk_delete_reviews(
+    criteria: models.ReviewBulkDelete,
+    current_user = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    conditions = crud.review_filter_conditions(
+        ids=criteria.ids,
+        user_id=criteria.user_id,
+        movie_id=criteria.movie_id,
+        created_from=changes.naive_utc(criteria.created_from),
+        created_to=changes.naive_utc(criteria.created_to),
+        comment_contains=criteria.comment_contains
+    )
+    return await crud.bulk_delete_reviews(db, conditions)
+
+@router.delete("/admin/users/{user_id}/reviews",
+              response_model=models.BulkDeleteResult,
+              summary="Удалить все отзывы пользователя (админ)",
+              description="Удаляет все отзывы указанного пользователя и пересчитывает рейтинги затронутых фильмов. Только для администраторов.")
+async def admin_delete_user_reviews(
+    user_id: int,
+    current_user = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await crud.bulk_delete_reviews(db, crud.review_filter_conditions(user_id=user_id))
+
 @router.get("/user/reviews-with-details/", 
            response_model=List[models.ReviewWithDetailsResponse],
+           response_class=ORJSONResponse,
            summary="Получить отзывы пользователя с деталями",
-           description="Возвращает отзывы текущего пользователя с детальной информацией о фильмах.")
+           description="Возвращает отзывы текущего пользователя с детальной информацией о фильмах, от новых к старым. Следующая страница - параметр cursor из заголовка X-Next-Cursor.")
 async def get_user_reviews_with_details(
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Значение заголовка X-Next-Cursor предыдущей страницы"),
+    movie_id: Optional[int] = Query(None),
+    created_from: Optional[datetime] = Query(None, description="Отзывы, созданные не раньше этой даты"),
+    created_to: Optional[datetime] = Query(None, description="Отзывы, созданные раньше этой даты"),
     current_user = Depends(auth.get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    from sqlalchemy.orm import selectinload
-    
-    result = await db.execute(
-        select(ReviewDB, MovieDB)
-        .join(MovieDB, ReviewDB.movie_id == MovieDB.id)
-        .where(ReviewDB.user_id == current_user.id)
-        .order_by(ReviewDB.created_at.desc())
+    rows = await crud.get_reviews_with_details(
+        db,
+        user_id=current_user.id,
+        movie_id=movie_id,
+        created_from=changes.naive_utc(created_from),
+        created_to=changes.naive_utc(created_to),
+        before=changes.decode_cursor(cursor, "cursor"),
+        limit=limit
     )
+    return reviews_page(rows, limit)
+
+@router.get("/movies/reviews-preview",
+           response_model=List[models.MovieReviewsPreview],
+           summary="Получить последние отзывы для списка фильмов",
+           description="Возвращает последние per_movie отзывов и общее число отзывов для каждого фильма из ids одним запросом к БД.")
+async def get_reviews_preview(
+    ids: str = Query(..., description="Список id фильмов через запятую, не более 100"),
+    per_movie: int = Query(3, ge=1, le=20),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        movie_ids = list(dict.fromkeys(int(value) for value in ids.split(",") if value.strip()))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Некорректный список id фильмов"
+        )
     
-    reviews_data = []
-    for review, movie in result.all():
-        review_response = models.ReviewWithDetailsResponse(
-            id=review.id,
-            movie_id=review.movie_id,
-            user_id=review.user_id,
-            rating=review.rating,
-            comment=review.comment,
-            created_at=review.created_at,
-            username=current_user.username,
-            user_email=current_user.email,
-            movie_title=movie.title,
-            movie_director=movie.director
+    if not movie_ids or len(movie_ids) > 100:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Укажите от 1 до 100 id фильмов"
         )
-        reviews_data.append(review_response)
     
-    return reviews_data
+    return await crud.get_review_previews(db, movie_ids, per_movie)
 
 @router.get("/movies/{movie_id}/reviews", 
            response_model=List[models.ReviewWithUserResponse],
+           response_class=ORJSONResponse,
            summary="Получить отзывы на фильм",
            description="Возвращает все отзывы на указанный фильм.")
 async def get_movie_reviews(
     movie_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    from sqlalchemy.orm import selectinload
-    
-    result = await db.execute(
-        select(ReviewDB)
-        .options(selectinload(ReviewDB.user))
-        .where(ReviewDB.movie_id == movie_id)
-    )
-    
-    reviews = result.scalars().all()
-    
-    review_responses = []
-    for review in reviews:
-        review_response = models.ReviewWithUserResponse(
-            id=review.id,
-            movie_id=review.movie_id,
-            user_id=review.user_id,
-            rating=review.rating,
-            comment=review.comment,
-            created_at=review.created_at,
-            username=review.user.username,
-            user_email=review.user.email
-        )
-        review_responses.append(review_response)
-    
-    return review_responses
\ No newline at end of file
+    return json_rows(await crud.get_movie_review_rows(db, movie_id), models.ReviewWithUserResponse)
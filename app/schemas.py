@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -7,22 +7,34 @@ class MovieDB(Base):
     __tablename__ = "movies"
     
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String(200), nullable=False, index=True)
+    title = Column(String(200), nullable=False)
     director = Column(String(100), nullable=False)
     year = Column(Integer, nullable=True)
     genre = Column(String(100), nullable=True)
-    rating = Column(Float, default=0.0, index=True)
+    rating = Column(Float, default=0.0)
+    weighted_score = Column(Float, nullable=True)
     description = Column(String(2000), nullable=True)
     duration = Column(Integer, nullable=True)
     cost = Column(Float, default=0.0)
     is_recommended = Column(Boolean, default=False)
-    photo_url = Column(String(500), default="static/default_movie.jpg")
+    photo_url = Column(String(500), default="static/default_movie.jpg", index=True)
+    photo_renditions = Column(JSON(none_as_null=True), nullable=True)
+    photo_render_failed_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     added_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     
     user = relationship("UserDB", back_populates="movies")
-    reviews = relationship("ReviewDB", back_populates="movie", cascade="all, delete-orphan")
+    reviews = relationship("ReviewDB", back_populates="movie", cascade="all, delete-orphan", passive_deletes=True)
+    
+    __table_args__ = (
+        Index("ix_movies_rating_id", "rating", "id"),
+        Index("ix_movies_year_id", "year", "id"),
+        Index("ix_movies_created_at_id", "created_at", "id"),
+        Index("ix_movies_title_id", "title", "id"),
+        Index("ix_movies_updated_at_id", "updated_at", "id"),
+        Index("ix_movies_weighted_score_id", "weighted_score", "id"),
+    )
 
 class UserDB(Base):
     __tablename__ = "users"
@@ -37,17 +49,128 @@ class UserDB(Base):
     last_login = Column(DateTime, nullable=True)
     
     movies = relationship("MovieDB", back_populates="user")
-    reviews = relationship("ReviewDB", back_populates="user", cascade="all, delete-orphan")
+    reviews = relationship("ReviewDB", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 class ReviewDB(Base):
     __tablename__ = "reviews"
     
     id = Column(Integer, primary_key=True, index=True)
-    movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     rating = Column(Integer, nullable=False)
     comment = Column(String(1000), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, nullable=True, onupdate=datetime.utcnow, index=True)
     
     movie = relationship("MovieDB", back_populates="reviews")
-    user = relationship("UserDB", back_populates="reviews")
\ No newline at end of file
+    user = relationship("UserDB", back_populates="reviews")
+    
+    __table_args__ = (
+        Index("ix_reviews_movie_id_created_at", "movie_id", "created_at"),
+        Index("ix_reviews_user_id_created_at", "user_id", "created_at"),
+    )
+
+class PhotoFileDB(Base):
+    __tablename__ = "photo_files"
+    
+    path = Column(String(500), primary_key=True)
+    sha256 = Column(String(64), nullable=True, index=True)
+    size = Column(Integer, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class MovieReviewSummaryDB(Base):
+    __tablename__ = "movie_review_summary"
+    
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    latest_review_ids = Column(JSON, nullable=True)
+    latest_snippet = Column(String(200), nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ReviewRatingTotalsDB(Base):
+    __tablename__ = "review_rating_totals"
+    
+    id = Column(Integer, primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    scored_mean = Column(Float, nullable=True)
+
+class MovieFacetCountDB(Base):
+    __tablename__ = "movie_facet_counts"
+    
+    facet = Column(String(20), primary_key=True)
+    value = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class MovieTombstoneDB(Base):
+    __tablename__ = "movie_tombstones"
+    
+    movie_id = Column(Integer, primary_key=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_movie_tombstones_deleted_at_movie_id", "deleted_at", "movie_id"),
+    )
+
+class ReviewTombstoneDB(Base):
+    __tablename__ = "review_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    review_id = Column(Integer, nullable=False)
+    movie_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_review_tombstones_deleted_at_movie_id", "deleted_at", "movie_id"),
+    )
+
+class JobDB(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    idempotency_key = Column(String(200), nullable=True)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String(1000), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+        Index(
+            "ix_jobs_pending_idempotency_key",
+            "idempotency_key",
+            unique=True,
+            sqlite_where=text("status = 'pending'")
+        ),
+    )
+
+class MovieTrendingScoreDB(Base):
+    __tablename__ = "movie_trending_scores"
+    
+    window = Column(String(8), primary_key=True)
+    movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False, default=0.0)
+    review_count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("ix_movie_trending_scores_window_score_movie_id", "window", "score", "movie_id"),
+    )
+
+class TrendingStateDB(Base):
+    __tablename__ = "trending_state"
+    
+    id = Column(Integer, primary_key=True)
+    anchor = Column(DateTime, nullable=False)
+    refreshed_at = Column(DateTime, nullable=False)
+    last_review_id = Column(Integer, nullable=False, default=0)
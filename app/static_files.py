@@ -0,0 +1,210 @@
+import gzip
+import hashlib
+import os
+import re
+import sys
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Optional, Tuple
+
+import anyio
+import brotli
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+CONTENT_HASH_NAME = re.compile(r"^[0-9a-f]{64}(_\d+)?$")
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".json", ".html", ".svg", ".txt", ".xml", ".map"}
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+SKIP_PRECOMPRESS_DIRS = {"uploads"}
+
+class RangeFileResponse(FileResponse):
+    def __init__(self, path, start: int, end: int, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, status_code=206, stat_result=stat_result, **kwargs)
+        self.start = start
+        self.end = end
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                more_body = remaining > 0 and len(chunk) > 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                if not chunk:
+                    break
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    start_text, _, end_text = ranges.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+            if end_text and end < start:
+                return None
+        else:
+            start = max(size - int(end_text), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    return start, min(end, size - 1)
+
+def accepted_image_format(accept: Optional[str]) -> str:
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+def accepted_encodings(request_headers: Headers) -> set:
+    accepted = set()
+    for item in request_headers.get("accept-encoding", "").split(","):
+        name, _, params = item.partition(";")
+        key, _, value = params.partition("=")
+        try:
+            quality = float(value) if key.strip() == "q" else 1.0
+        except ValueError:
+            quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+def opaque_tag(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return opaque_tag(etag) in [opaque_tag(tag.strip()) for tag in if_none_match.split(",")]
+
+def range_allowed(if_range: Optional[str], etag: str) -> bool:
+    if if_range is None:
+        return True
+    return not etag.startswith("W/") and if_range.strip() == etag
+
+def file_etag(full_path: str, stat_result: os.stat_result) -> Tuple[str, bool]:
+    stem = os.path.splitext(os.path.basename(full_path))[0]
+    if CONTENT_HASH_NAME.match(stem):
+        return f'"{stem}"', True
+    digest = hashlib.md5(f"{stat_result.st_mtime}-{stat_result.st_size}".encode()).hexdigest()
+    return f'W/"{digest}"', False
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        if status_code != 200:
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        full_path = str(full_path)
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        etag, immutable = file_etag(full_path, stat_result)
+
+        headers = {
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "accept-ranges": "bytes",
+        }
+        serve_path = full_path
+        range_header = request_headers.get("range")
+
+        if os.path.splitext(full_path)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            headers["vary"] = "Accept-Encoding"
+            accepted = accepted_encodings(request_headers)
+            for encoding, suffix in ENCODINGS:
+                if encoding in accepted and os.path.isfile(full_path + suffix):
+                    serve_path = full_path + suffix
+                    stat_result = os.stat(serve_path)
+                    etag = f'{etag[:-1]}-{encoding}"'
+                    headers["content-encoding"] = encoding
+                    headers.pop("accept-ranges")
+                    range_header = None
+                    break
+
+        headers["etag"] = etag
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if etag_matches(if_none_match, etag):
+                return NotModifiedResponse(Headers(headers))
+        elif self.is_not_modified(
+            Headers({"last-modified": formatdate(stat_result.st_mtime, usegmt=True)}),
+            request_headers
+        ):
+            return NotModifiedResponse(Headers(headers))
+
+        if range_header and method == "GET" and range_allowed(request_headers.get("if-range"), etag):
+            byte_range = parse_range(range_header, stat_result.st_size)
+            if byte_range is not None:
+                start, end = byte_range
+                if start >= stat_result.st_size:
+                    return Response(
+                        status_code=416,
+                        headers={"content-range": f"bytes */{stat_result.st_size}", **headers}
+                    )
+                return RangeFileResponse(
+                    serve_path, start, end,
+                    stat_result=stat_result,
+                    headers=headers,
+                    media_type=media_type,
+                    method=method
+                )
+
+        return FileResponse(
+            serve_path,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=media_type,
+            method=method
+        )
+
+def precompress_file(path: str):
+    with open(path, "rb") as source:
+        data = source.read()
+    mtime = os.path.getmtime(path)
+
+    variants = {
+        ".gz": lambda: gzip.compress(data, compresslevel=9, mtime=0),
+        ".br": lambda: brotli.compress(data, quality=11),
+    }
+    for suffix, compress in variants.items():
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        compressed = compress()
+        if len(compressed) < len(data):
+            with open(target, "wb") as buffer:
+                buffer.write(compressed)
+
+def precompress_directory(directory: str = "static"):
+    for root, dirs, files in os.walk(directory):
+        if root == directory:
+            dirs[:] = [name for name in dirs if name not in SKIP_PRECOMPRESS_DIRS]
+        for name in files:
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                precompress_file(os.path.join(root, name))
+
+if __name__ == "__main__":
+    precompress_directory(sys.argv[1] if len(sys.argv) > 1 else "static")
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import tempfile
+import time
+from typing import Iterable, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import images
+from app.schemas import MovieDB, PhotoFileDB
+
+UPLOADS_DIR = images.UPLOADS_DIR
+DEFAULT_PHOTO = images.DEFAULT_PHOTO
+CHUNK_SIZE = 1024 * 1024
+PURGE_GRACE_SECONDS = float(os.getenv("PHOTO_PURGE_GRACE_SECONDS", "300"))
+
+def content_path(digest: str, extension: str) -> str:
+    return f"{UPLOADS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+def _write_temp(photo: UploadFile):
+    tmp_dir = os.path.join(UPLOADS_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+
+    with tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False) as buffer:
+        while chunk := photo.file.read(CHUNK_SIZE):
+            sha256.update(chunk)
+            buffer.write(chunk)
+            size += len(chunk)
+
+    return buffer.name, sha256.hexdigest(), size
+
+async def acquire(db: AsyncSession, path: str, **values):
+    result = await db.execute(
+        update(PhotoFileDB)
+        .where(PhotoFileDB.path == path)
+        .values(ref_count=PhotoFileDB.ref_count + 1, **values)
+    )
+    if result.rowcount == 0:
+        await db.execute(insert(PhotoFileDB).values(path=path, ref_count=1, **values))
+
+async def release(db: AsyncSession, path: Optional[str]):
+    if not path or path == DEFAULT_PHOTO:
+        return
+    await db.execute(
+        update(PhotoFileDB)
+        .where(PhotoFileDB.path == path)
+        .values(ref_count=PhotoFileDB.ref_count - 1)
+    )
+
+async def save_upload(db: AsyncSession, photo: UploadFile) -> str:
+    tmp_path, digest, size = _write_temp(photo)
+
+    result = await db.execute(
+        select(PhotoFileDB.path).where(PhotoFileDB.sha256 == digest).limit(1)
+    )
+    path = result.scalar_one_or_none()
+
+    if path is None:
+        extension = os.path.splitext(photo.filename)[1].lower()
+        path = content_path(digest, extension)
+
+    reused = touch(path)
+    await acquire(db, path, sha256=digest, size=size)
+
+    if reused and os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    return path
+
+def touch(path: str) -> bool:
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+def recently_used(path: str) -> bool:
+    try:
+        return os.path.getmtime(path) > time.time() - PURGE_GRACE_SECONDS
+    except FileNotFoundError:
+        return False
+
+def remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+    images.remove_renditions(path)
+
+async def purge_unreferenced(db: AsyncSession, paths: Iterable[Optional[str]]):
+    paths = [path for path in paths if path and path != DEFAULT_PHOTO]
+    if not paths:
+        return
+
+    result = await db.execute(
+        delete(PhotoFileDB)
+        .where(PhotoFileDB.path.in_(paths), PhotoFileDB.ref_count <= 0)
+        .returning(PhotoFileDB.path)
+    )
+    unreferenced = result.scalars().all()
+    await db.commit()
+    for path in unreferenced:
+        if not recently_used(path):
+            remove_file(path)
+
+async def sync_ref_counts(db: AsyncSession):
+    references = (
+        select(func.count(MovieDB.id))
+        .where(MovieDB.photo_url == PhotoFileDB.path)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(PhotoFileDB)
+        .where(PhotoFileDB.ref_count != references)
+        .values(ref_count=references)
+        .execution_options(synchronize_session=False)
+    )
+
+    known = select(PhotoFileDB.path)
+    result = await db.execute(
+        select(MovieDB.photo_url, func.count(MovieDB.id))
+        .where(
+            MovieDB.photo_url.is_not(None),
+            MovieDB.photo_url != DEFAULT_PHOTO,
+            MovieDB.photo_url.not_in(known)
+        )
+        .group_by(MovieDB.photo_url)
+    )
+    rows = result.all()
+    if rows:
+        await db.execute(
+            insert(PhotoFileDB),
+            [{"path": path, "ref_count": count} for path, count in rows]
+        )
+    await db.commit()
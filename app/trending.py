@@ -0,0 +1,262 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, delete, func, insert, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, response_cache
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB, MovieTrendingScoreDB, ReviewDB, ReviewTombstoneDB, TrendingStateDB
+
+REFRESH_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", "60"))
+REBUILD_HOURS = float(os.getenv("TRENDING_REBUILD_HOURS", "24"))
+DIRTY_OVERLAP = timedelta(seconds=float(os.getenv("TRENDING_DIRTY_OVERLAP_SECONDS", "30")))
+WINDOWS = {
+    "24h": (timedelta(hours=24), timedelta(hours=6)),
+    "7d": (timedelta(days=7), timedelta(days=1)),
+    "30d": (timedelta(days=30), timedelta(days=5)),
+}
+LONGEST_WINDOW = max(length for length, _ in WINDOWS.values())
+SCAN_BATCH_SIZE = 5000
+LOOKUP_BATCH_SIZE = 500
+
+scores_table = MovieTrendingScoreDB.__table__
+update_score = (
+    update(scores_table)
+    .where(scores_table.c.window == bindparam("window_key"), scores_table.c.movie_id == bindparam("movie_key"))
+    .values(
+        score=scores_table.c.score + bindparam("score_delta"),
+        review_count=scores_table.c.review_count + bindparam("count_delta")
+    )
+)
+
+Deltas = Dict[Tuple[str, int], List[float]]
+
+_periodic_task = None
+stats = {"refreshes": 0, "rebuilds": 0, "scanned_reviews": 0, "skipped": 0}
+
+def parse_window(window: str) -> str:
+    if window not in WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Неизвестное окно: {window}, допустимые значения: {', '.join(WINDOWS)}"
+        )
+    return window
+
+def decay(moment: datetime, anchor: datetime, half_life: timedelta) -> float:
+    return 2 ** ((moment - anchor) / half_life)
+
+def add_review(deltas: Deltas, review, anchor: datetime, windows: Iterable[str], sign: int = 1):
+    for window in windows:
+        delta = deltas.setdefault((window, review.movie_id), [0.0, 0])
+        delta[0] += sign * review.rating / 5 * decay(review.created_at, anchor, WINDOWS[window][1])
+        delta[1] += sign
+
+def windows_containing(created_at: datetime, now: datetime) -> List[str]:
+    return [window for window, (length, _) in WINDOWS.items() if created_at >= now - length]
+
+def review_columns():
+    return select(ReviewDB.id, ReviewDB.movie_id, ReviewDB.rating, ReviewDB.created_at)
+
+async def scan(db: AsyncSession, query, handle):
+    result = await db.stream(query.execution_options(yield_per=SCAN_BATCH_SIZE))
+    async for partition in result.partitions(SCAN_BATCH_SIZE):
+        stats["scanned_reviews"] += len(partition)
+        for review in partition:
+            handle(review)
+
+async def apply_deltas(db: AsyncSession, deltas: Deltas):
+    if not deltas:
+        return
+
+    existing = set()
+    for window in WINDOWS:
+        movie_ids = [movie_id for key_window, movie_id in deltas if key_window == window]
+        for start in range(0, len(movie_ids), LOOKUP_BATCH_SIZE):
+            result = await db.execute(
+                select(MovieTrendingScoreDB.movie_id).where(
+                    MovieTrendingScoreDB.window == window,
+                    MovieTrendingScoreDB.movie_id.in_(movie_ids[start:start + LOOKUP_BATCH_SIZE])
+                )
+            )
+            existing.update((window, movie_id) for movie_id in result.scalars())
+
+    updates = [
+        {"window_key": window, "movie_key": movie_id, "score_delta": score, "count_delta": count}
+        for (window, movie_id), (score, count) in deltas.items()
+        if (window, movie_id) in existing and count
+    ]
+    inserts = [
+        {"window": window, "movie_id": movie_id, "score": score, "review_count": count}
+        for (window, movie_id), (score, count) in deltas.items()
+        if (window, movie_id) not in existing and count > 0
+    ]
+    if updates:
+        await db.execute(update_score, updates)
+    if inserts:
+        await db.execute(insert(MovieTrendingScoreDB), inserts)
+    await db.execute(delete(MovieTrendingScoreDB).where(MovieTrendingScoreDB.review_count <= 0))
+
+async def claim_state(db: AsyncSession, state: TrendingStateDB, values: dict) -> bool:
+    result = await db.execute(
+        update(TrendingStateDB)
+        .where(TrendingStateDB.id == state.id, TrendingStateDB.refreshed_at == state.refreshed_at)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+async def rebuild(db: AsyncSession, state: Optional[TrendingStateDB], now: datetime, last_review_id: int) -> bool:
+    values = {"anchor": now, "refreshed_at": now, "last_review_id": last_review_id}
+    if state is None:
+        db.add(TrendingStateDB(id=1, **values))
+        await db.flush()
+    elif not await claim_state(db, state, values):
+        return False
+
+    deltas: Deltas = {}
+    await db.execute(delete(MovieTrendingScoreDB))
+    await scan(
+        db,
+        review_columns().where(ReviewDB.created_at >= now - LONGEST_WINDOW, ReviewDB.id <= last_review_id),
+        lambda review: add_review(deltas, review, now, windows_containing(review.created_at, now))
+    )
+    await apply_deltas(db, deltas)
+    stats["rebuilds"] += 1
+    return True
+
+async def changed_movie_ids(db: AsyncSession, since: datetime, previous_review_id: int) -> Set[int]:
+    result = await db.execute(
+        union(
+            select(ReviewDB.movie_id).where(ReviewDB.updated_at >= since),
+            select(ReviewDB.movie_id).where(ReviewDB.created_at >= since, ReviewDB.id <= previous_review_id),
+            select(ReviewTombstoneDB.movie_id).where(ReviewTombstoneDB.deleted_at >= since)
+        )
+    )
+    return set(result.scalars().all())
+
+async def refresh_incrementally(db: AsyncSession, state: TrendingStateDB, now: datetime, last_review_id: int) -> bool:
+    anchor = state.anchor
+    previous = state.refreshed_at
+    previous_review_id = state.last_review_id
+    if not await claim_state(db, state, {"refreshed_at": now, "last_review_id": last_review_id}):
+        return False
+
+    dirty = await changed_movie_ids(db, previous - DIRTY_OVERLAP, previous_review_id)
+    deltas: Deltas = {}
+
+    def add_new(review):
+        if review.movie_id not in dirty:
+            add_review(deltas, review, anchor, windows_containing(review.created_at, now))
+
+    await scan(
+        db,
+        review_columns().where(ReviewDB.id > previous_review_id, ReviewDB.id <= last_review_id),
+        add_new
+    )
+
+    for window, (length, _) in WINDOWS.items():
+        def expire(review, window=window):
+            if review.movie_id not in dirty:
+                add_review(deltas, review, anchor, [window], sign=-1)
+
+        await scan(
+            db,
+            review_columns().where(
+                ReviewDB.created_at >= previous - length,
+                ReviewDB.created_at < now - length,
+                ReviewDB.id <= previous_review_id
+            ),
+            expire
+        )
+
+    dirty_ids = sorted(dirty)
+    for start in range(0, len(dirty_ids), LOOKUP_BATCH_SIZE):
+        batch = dirty_ids[start:start + LOOKUP_BATCH_SIZE]
+        await db.execute(delete(MovieTrendingScoreDB).where(MovieTrendingScoreDB.movie_id.in_(batch)))
+        await scan(
+            db,
+            review_columns().where(
+                ReviewDB.movie_id.in_(batch),
+                ReviewDB.created_at >= now - LONGEST_WINDOW,
+                ReviewDB.id <= last_review_id
+            ),
+            lambda review: add_review(deltas, review, anchor, windows_containing(review.created_at, now))
+        )
+
+    await apply_deltas(db, deltas)
+    return True
+
+async def refresh(db: AsyncSession, full: bool = False) -> bool:
+    now = datetime.utcnow()
+    try:
+        state = await db.get(TrendingStateDB, 1)
+        last_review_id = await db.scalar(select(func.coalesce(func.max(ReviewDB.id), 0)))
+        if (
+            full
+            or state is None
+            or now - state.anchor >= timedelta(hours=REBUILD_HOURS)
+            or now < state.refreshed_at
+        ):
+            refreshed = await rebuild(db, state, now, last_review_id)
+        else:
+            refreshed = await refresh_incrementally(db, state, now, last_review_id)
+        if refreshed:
+            await db.execute(delete(ReviewTombstoneDB).where(ReviewTombstoneDB.deleted_at < now - DIRTY_OVERLAP))
+    except Exception:
+        await db.rollback()
+        raise
+
+    if not refreshed:
+        await db.rollback()
+        stats["skipped"] += 1
+        return False
+
+    await db.commit()
+    stats["refreshes"] += 1
+    response_cache.purge("trending")
+    return True
+
+async def get_trending(db: AsyncSession, window: str, limit: int) -> List[models.TrendingMovieResponse]:
+    half_life = WINDOWS[parse_window(window)][1]
+    anchor = select(TrendingStateDB.anchor).where(TrendingStateDB.id == 1).scalar_subquery()
+    result = await db.execute(
+        select(MovieDB, MovieTrendingScoreDB.score, MovieTrendingScoreDB.review_count, anchor)
+        .join(MovieTrendingScoreDB, MovieTrendingScoreDB.movie_id == MovieDB.id)
+        .where(MovieTrendingScoreDB.window == window)
+        .order_by(MovieTrendingScoreDB.score.desc(), MovieTrendingScoreDB.movie_id.desc())
+        .limit(limit)
+    )
+    now = datetime.utcnow()
+    return [
+        models.TrendingMovieResponse(
+            **models.MovieResponse.model_validate(movie).model_dump(),
+            trending_score=round(score * decay(anchor_at, now, half_life), 6),
+            trending_review_count=review_count
+        )
+        for movie, score, review_count, anchor_at in result.all()
+    ]
+
+async def run_periodically(interval_seconds: float = REFRESH_SECONDS):
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                await refresh(session)
+        except Exception as e:
+            print(f"Ошибка обновления популярных фильмов: {e}")
+        await asyncio.sleep(interval_seconds)
+
+def start_periodic():
+    global _periodic_task
+    if REFRESH_SECONDS > 0 and _periodic_task is None:
+        _periodic_task = asyncio.create_task(run_periodically())
+
+async def stop_periodic():
+    global _periodic_task
+    if _periodic_task is not None:
+        _periodic_task.cancel()
+        await asyncio.gather(_periodic_task, return_exceptions=True)
+        _periodic_task = None
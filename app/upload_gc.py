@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import glob
+import os
+import time
+from itertools import islice
+from typing import Iterator, List
+
+from sqlalchemy import delete, select
+
+from app import images, storage
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB, PhotoFileDB
+
+UPLOADS_DIR = images.UPLOADS_DIR
+RENDITIONS_DIR = images.RENDITIONS_DIR
+GRACE_PERIOD_HOURS = float(os.getenv("UPLOAD_GC_GRACE_HOURS", "24"))
+INTERVAL_MINUTES = float(os.getenv("UPLOAD_GC_INTERVAL_MINUTES", "0"))
+CHUNK_SIZE = 1000
+DANGLING_SAMPLE_SIZE = 100
+
+_periodic_task = None
+
+def iter_files(directory: str, exclude: str = None) -> Iterator[os.DirEntry]:
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path != exclude:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+        except FileNotFoundError:
+            continue
+
+def next_chunk(iterator: Iterator[os.DirEntry], size: int) -> List[tuple]:
+    chunk = []
+    for entry in islice(iterator, size):
+        try:
+            stat_result = entry.stat()
+        except FileNotFoundError:
+            continue
+        chunk.append((entry.path.replace(os.sep, "/"), stat_result.st_mtime, stat_result.st_size))
+    return chunk
+
+def source_exists(rendition_path: str, cache: dict) -> bool:
+    relative_dir = os.path.relpath(os.path.dirname(rendition_path), RENDITIONS_DIR)
+    stem = os.path.basename(rendition_path).rsplit("_", 1)[0]
+    pattern = os.path.normpath(os.path.join(UPLOADS_DIR, relative_dir, f"{glob.escape(stem)}.*"))
+    if pattern not in cache:
+        cache[pattern] = bool(glob.glob(pattern))
+    return cache[pattern]
+
+async def collect_uploads(report: dict, cutoff: float, chunk_size: int, dry_run: bool):
+    iterator = iter_files(UPLOADS_DIR, exclude=RENDITIONS_DIR)
+    while True:
+        chunk = await asyncio.to_thread(next_chunk, iterator, chunk_size)
+        if not chunk:
+            return
+        report["scanned_files"] += len(chunk)
+
+        paths = [path for path, _, _ in chunk]
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(MovieDB.photo_url).where(MovieDB.photo_url.in_(paths)).distinct()
+            )
+            referenced = set(result.scalars().all())
+
+            orphans = []
+            for path, mtime, size in chunk:
+                if path in referenced:
+                    continue
+                if mtime > cutoff:
+                    report["skipped_recent"] += 1
+                    continue
+                orphans.append(path)
+                report["deleted_files"] += 1
+                report["freed_bytes"] += size
+
+            if orphans and not dry_run:
+                await session.execute(delete(PhotoFileDB).where(PhotoFileDB.path.in_(orphans)))
+                await session.commit()
+                await asyncio.to_thread(lambda: [storage.remove_file(path) for path in orphans])
+
+def collect_rendition_chunk(report: dict, chunk: List[tuple], cutoff: float, dry_run: bool):
+    cache = {}
+    for path, mtime, size in chunk:
+        if source_exists(path, cache):
+            continue
+        if mtime > cutoff:
+            report["skipped_recent"] += 1
+            continue
+        report["deleted_files"] += 1
+        report["freed_bytes"] += size
+        if not dry_run and os.path.exists(path):
+            os.remove(path)
+
+async def collect_renditions(report: dict, cutoff: float, chunk_size: int, dry_run: bool):
+    iterator = iter_files(RENDITIONS_DIR)
+    while True:
+        chunk = await asyncio.to_thread(next_chunk, iterator, chunk_size)
+        if not chunk:
+            return
+        report["scanned_files"] += len(chunk)
+        await asyncio.to_thread(collect_rendition_chunk, report, chunk, cutoff, dry_run)
+
+async def find_dangling(report: dict, chunk_size: int):
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(MovieDB.id, MovieDB.photo_url)
+                .where(MovieDB.id > last_id, MovieDB.photo_url != storage.DEFAULT_PHOTO)
+                .order_by(MovieDB.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+        if not rows:
+            return
+
+        missing = await asyncio.to_thread(
+            lambda: [(row.id, row.photo_url) for row in rows if row.photo_url and not os.path.exists(row.photo_url)]
+        )
+        report["dangling_count"] += len(missing)
+        free_slots = DANGLING_SAMPLE_SIZE - len(report["dangling"])
+        report["dangling"].extend(missing[:max(free_slots, 0)])
+        last_id = rows[-1].id
+
+async def collect_garbage(
+    grace_period_hours: float = GRACE_PERIOD_HOURS,
+    chunk_size: int = CHUNK_SIZE,
+    dry_run: bool = False
+) -> dict:
+    cutoff = time.time() - grace_period_hours * 3600
+    report = {
+        "scanned_files": 0,
+        "deleted_files": 0,
+        "freed_bytes": 0,
+        "skipped_recent": 0,
+        "dangling_count": 0,
+        "dangling": [],
+        "dry_run": dry_run,
+    }
+
+    await collect_uploads(report, cutoff, chunk_size, dry_run)
+    await collect_renditions(report, cutoff, chunk_size, dry_run)
+    await find_dangling(report, chunk_size)
+    return report
+
+def print_report(report: dict):
+    action = "Будет удалено" if report["dry_run"] else "Удалено"
+    print(f"Просмотрено файлов: {report['scanned_files']}")
+    print(f"{action} файлов: {report['deleted_files']} ({report['freed_bytes']} байт)")
+    print(f"Пропущено недавних файлов: {report['skipped_recent']}")
+    print(f"Фильмов с отсутствующим файлом: {report['dangling_count']}")
+    for movie_id, photo_url in report["dangling"]:
+        print(f"  фильм {movie_id}: {photo_url}")
+
+async def run_periodically(interval_minutes: float = INTERVAL_MINUTES):
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            print_report(await collect_garbage())
+        except Exception as e:
+            print(f"Ошибка очистки загрузок: {e}")
+
+def start_periodic():
+    global _periodic_task
+    if INTERVAL_MINUTES > 0 and _periodic_task is None:
+        _periodic_task = asyncio.create_task(run_periodically())
+
+def stop_periodic():
+    global _periodic_task
+    if _periodic_task is not None:
+        _periodic_task.cancel()
+        _periodic_task = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Удаление неиспользуемых файлов из static/uploads")
+    parser.add_argument("--grace-hours", type=float, default=GRACE_PERIOD_HOURS)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    report = asyncio.run(collect_garbage(args.grace_hours, args.chunk_size, args.dry_run))
+    print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, routes
+
+def make_rows(count: int) -> List[dict]:
+    created_at = datetime(2025, 1, 1)
+    return [
+        {
+            "id": index,
+            "movie_id": index % 50 + 1,
+            "user_id": index % 20 + 1,
+            "rating": index % 5 + 1,
+            "comment": "Отличный фильм, пересмотрю ещё раз. " * 3,
+            "created_at": created_at + timedelta(minutes=index),
+            "username": f"user{index % 20}",
+            "user_email": f"user{index % 20}@example.com",
+            "movie_title": f"Фильм {index % 50}",
+            "movie_director": "Режиссёр",
+        }
+        for index in range(count)
+    ]
+
+async def model_path(rows: List[dict], field) -> bytes:
+    content = [models.ReviewWithDetailsResponse(**row) for row in rows]
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+async def validated_path(rows: List[dict], field) -> bytes:
+    routes.FAST_JSON_ROWS = False
+    return routes.json_rows(rows, models.ReviewWithDetailsResponse).body
+
+async def fast_path(rows: List[dict], field) -> bytes:
+    routes.FAST_JSON_ROWS = True
+    return routes.json_rows(rows, models.ReviewWithDetailsResponse).body
+
+async def measure(path, rows: List[dict], field, iterations: int) -> float:
+    await path(rows, field)
+    started = time.process_time()
+    for _ in range(iterations):
+        await path(rows, field)
+    return (time.process_time() - started) / iterations * 1_000_000
+
+async def run(rows_per_page: int, iterations: int):
+    rows = make_rows(rows_per_page)
+    field = create_response_field(name="response", type_=List[models.ReviewWithDetailsResponse])
+    before = await measure(model_path, rows, field, iterations)
+    validated = await measure(validated_path, rows, field, iterations)
+    after = await measure(fast_path, rows, field, iterations)
+    print(f"Страница из {rows_per_page} строк, {iterations} итераций")
+    print(f"Pydantic-модели + response_model + json:          {before:.0f} мкс CPU на страницу")
+    print(f"Строки Core + TypeAdapter + orjson (по умолчанию): {validated:.0f} мкс CPU на страницу")
+    print(f"Строки Core + orjson (FAST_JSON_ROWS=1):           {after:.0f} мкс CPU на страницу")
+    print(f"Ускорение: x{before / validated:.1f} по умолчанию, x{before / after:.1f} с FAST_JSON_ROWS=1")
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение сериализации списков отзывов")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.iterations))
+
+if __name__ == "__main__":
+    main()
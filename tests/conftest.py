@@ -0,0 +1,80 @@
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp(prefix="movies-tests-")
+
+os.chdir(WORK_DIR)
+os.makedirs("static/uploads", exist_ok=True)
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{WORK_DIR}/test.db"
+os.environ["TRENDING_REFRESH_SECONDS"] = "0"
+os.environ["WEIGHTED_RESCORE_MINUTES"] = "0"
+sys.path.insert(0, ROOT_DIR)
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app import facets, login_tracker, main, movie_cache, response_cache
+from app.database import Base, engine
+
+async def clear_database():
+    async with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            await conn.execute(table.delete())
+
+def reset_state():
+    movie_cache.configure(movie_cache.MemoryBackend())
+    response_cache.clear()
+    facets._cache.clear()
+    login_tracker._pending.clear()
+
+@pytest.fixture
+def client():
+    reset_state()
+    with TestClient(main.app) as test_client:
+        yield test_client
+        test_client.portal.call(clear_database)
+    reset_state()
+
+@pytest.fixture
+def run(client):
+    def call(function, *args):
+        return client.portal.call(function, *args)
+    return call
+
+def login(client, username: str, password: str = "secret1") -> dict:
+    client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": password})
+    response = client.post("/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": "Bearer " + response.json()["access_token"]}
+
+def admin_login(client) -> dict:
+    response = client.post("/auth/login", json={"username": "admin", "password": "admin123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": "Bearer " + response.json()["access_token"]}
+
+def png_bytes(color=(200, 30, 30), size=(800, 1200)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def create_movie(client, headers: dict, title: str, photo: bytes = None, **fields) -> dict:
+    data = {"title": title, "director": "Director", **{key: str(value) for key, value in fields.items()}}
+    files = {"photo": ("poster.png", photo, "image/png")} if photo else None
+    response = client.post("/user/movies/", data=data, files=files, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def wait_for(predicate, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError("условие не выполнилось за отведенное время")
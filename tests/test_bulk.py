@@ -0,0 +1,123 @@
+from sqlalchemy import delete, select
+
+from app import crud
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB, UserDB
+from conftest import admin_login, create_movie, login
+
+def test_bulk_movies_report_per_item_results(client):
+    headers = login(client, "alice")
+    items = [
+        {"title": "First", "director": "Director", "genre": "Drama", "year": 2001},
+        {"title": "", "director": "Director"},
+        {"title": "Third", "director": "Director", "rating": 11},
+        "not an object",
+        {"title": "Fifth", "director": "Director", "genre": "Drama"},
+    ]
+
+    response = client.post("/user/movies/bulk", json=items, headers=headers)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (2, 3)
+    assert [item["index"] for item in body["results"]] == list(range(5))
+    assert [item["id"] is not None for item in body["results"]] == [True, False, False, False, True]
+    assert all(item["error"] for item in body["results"] if item["id"] is None)
+    assert "title" in body["results"][1]["error"]
+    assert "rating" in body["results"][2]["error"]
+
+    created = {item["id"] for item in body["results"] if item["id"]}
+    mine = client.get("/user/movies/", headers=headers).json()
+    assert {movie["id"] for movie in mine} == created
+    genres = {facet["value"]: facet["count"] for facet in client.get("/movies/facets").json()["genre"]}
+    assert genres == {"Drama": 2}
+
+def test_bulk_reviews_report_per_item_results_and_update_ratings(client):
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    first = create_movie(client, owner, "First")
+    second = create_movie(client, owner, "Second")
+    client.post("/reviews/", json={"movie_id": second["id"], "rating": 3}, headers=reviewer)
+
+    items = [
+        {"movie_id": first["id"], "rating": 5},
+        {"movie_id": first["id"], "rating": 4},
+        {"movie_id": second["id"], "rating": 1},
+        {"movie_id": 9999, "rating": 2},
+        {"movie_id": first["id"], "rating": 9},
+    ]
+    response = client.post("/reviews/bulk", json=items, headers=reviewer)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 4)
+    results = body["results"]
+    assert results[0]["id"] is not None and results[0]["error"] is None
+    assert results[1]["error"] == "Вы уже оставляли отзыв на этот фильм"
+    assert results[2]["error"] == "Вы уже оставляли отзыв на этот фильм"
+    assert results[3]["error"] == "Фильм не найден"
+    assert "rating" in results[4]["error"]
+
+    movie = client.get(f"/movies/{first['id']}").json()
+    assert movie["rating"] == 10.0
+    assert [review["id"] for review in client.get(f"/movies/{first['id']}/reviews").json()] == [results[0]["id"]]
+
+def test_bulk_request_over_limit_is_rejected(client):
+    headers = login(client, "alice")
+    items = [{"title": f"Movie {index}", "director": "Director"} for index in range(crud.BULK_MAX_ITEMS + 1)]
+
+    response = client.post("/user/movies/bulk", json=items, headers=headers)
+
+    assert response.status_code == 422
+    assert client.get("/user/movies/", headers=headers).json() == []
+
+def test_bulk_delete_removes_matching_reviews_and_recomputes_ratings(client):
+    owner = login(client, "alice")
+    spammer = login(client, "spammer")
+    fan = login(client, "fan")
+    first = create_movie(client, owner, "First")
+    second = create_movie(client, owner, "Second")
+    for movie in (first, second):
+        client.post("/reviews/", json={"movie_id": movie["id"], "rating": 1, "comment": "купите рекламу"}, headers=spammer)
+    client.post("/reviews/", json={"movie_id": first["id"], "rating": 5, "comment": "отлично"}, headers=fan)
+    admin = admin_login(client)
+
+    assert client.post("/admin/reviews/bulk-delete", json={}, headers=admin).status_code == 422
+    assert client.post("/admin/reviews/bulk-delete", json={"comment_contains": "рекламу"}, headers=owner).status_code == 403
+
+    response = client.post("/admin/reviews/bulk-delete", json={"comment_contains": "рекламу"}, headers=admin)
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"deleted": 2, "movies_updated": 2}
+    assert client.get(f"/movies/{first['id']}").json()["rating"] == 10.0
+    assert client.get(f"/movies/{second['id']}").json()["rating"] == 0.0
+    assert [review["comment"] for review in client.get(f"/movies/{first['id']}/reviews").json()] == ["отлично"]
+
+def test_bulk_reviews_report_movies_deleted_before_the_insert(client, run):
+    owner = login(client, "alice")
+    login(client, "bob")
+    kept = create_movie(client, owner, "Kept")
+    removed = create_movie(client, owner, "Removed")
+
+    async def create_while_deleting():
+        async with AsyncSessionLocal() as session:
+            user_id = await session.scalar(select(UserDB.id).where(UserDB.username == "bob"))
+            execute = session.execute
+
+            async def delete_after_existence_check(statement, *args, **kwargs):
+                result = await execute(statement, *args, **kwargs)
+                session.execute = execute
+                await execute(delete(MovieDB).where(MovieDB.id == removed["id"]))
+                return result
+
+            session.execute = delete_after_existence_check
+            items = [{"movie_id": removed["id"], "rating": 2}, {"movie_id": kept["id"], "rating": 4}]
+            return await crud.bulk_create_reviews(session, items, user_id)
+
+    result = run(create_while_deleting)
+
+    assert (result.created, result.failed) == (1, 1)
+    assert result.results[0].error == "Фильм не найден"
+    assert result.results[1].id is not None
+    assert client.get(f"/movies/{removed['id']}").status_code == 404
+    assert [review["id"] for review in client.get(f"/movies/{kept['id']}/reviews").json()] == [result.results[1].id]
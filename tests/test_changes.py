@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import changes
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB
+from conftest import create_movie, login
+
+async def set_updated_at(movie_id, seconds_ago):
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(MovieDB)
+            .where(MovieDB.id == movie_id)
+            .values(updated_at=datetime.utcnow() - timedelta(seconds=seconds_ago))
+        )
+        await session.commit()
+
+def test_changes_page_through_upserts_and_deletes(client, monkeypatch):
+    monkeypatch.setattr(changes, "SAFETY_SECONDS", 0)
+    headers = login(client, "alice")
+    movies = [create_movie(client, headers, f"Movie {index}") for index in range(3)]
+
+    first = client.get("/movies/changes?limit=2").json()
+    assert [movie["id"] for movie in first["upserted"]] == [movies[0]["id"], movies[1]["id"]]
+    assert first["has_more"]
+
+    client.delete(f"/user/movies/{movies[0]['id']}", headers=headers)
+    second = client.get(f"/movies/changes?since={first['next_cursor']}").json()
+    assert [movie["id"] for movie in second["upserted"]] == [movies[2]["id"]]
+    assert second["deleted"] == [movies[0]["id"]]
+    assert not second["has_more"]
+
+    third = client.get(f"/movies/changes?since={second['next_cursor']}").json()
+    assert third["upserted"] == [] and third["deleted"] == []
+    assert third["next_cursor"] == second["next_cursor"]
+
+def test_late_commit_behind_newer_change_is_not_skipped(client, run, monkeypatch):
+    monkeypatch.setattr(changes, "SAFETY_SECONDS", 5)
+    headers = login(client, "alice")
+    settled = create_movie(client, headers, "Settled")
+    recent = create_movie(client, headers, "Recent")
+    run(set_updated_at, settled["id"], 10)
+    run(set_updated_at, recent["id"], 1)
+
+    first = client.get("/movies/changes").json()
+    assert [movie["id"] for movie in first["upserted"]] == [settled["id"]]
+
+    late = create_movie(client, headers, "Late")
+    run(set_updated_at, late["id"], 2)
+    monkeypatch.setattr(changes, "SAFETY_SECONDS", 0)
+
+    second = client.get(f"/movies/changes?since={first['next_cursor']}").json()
+    assert [movie["id"] for movie in second["upserted"]] == [late["id"], recent["id"]]
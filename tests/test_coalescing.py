@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app import coalescing
+
+class SlowApp:
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": f"call {self.calls}".encode(), "more_body": False})
+
+def http_scope(path="/movies/", query=b"", headers=()):
+    return {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": list(headers)}
+
+async def request(middleware, scope):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+
+async def concurrently(app, scopes):
+    middleware = coalescing.SingleFlightMiddleware(app)
+    tasks = [asyncio.create_task(request(middleware, scope)) for scope in scopes]
+    await asyncio.sleep(0.01)
+    app.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True), middleware
+
+def test_identical_requests_share_one_execution():
+    async def scenario():
+        app = SlowApp()
+        scopes = [http_scope(query=b"limit=10&skip=0"), http_scope(query=b"skip=0&limit=10"), http_scope(query=b"limit=10&skip=0")]
+        bodies, middleware = await concurrently(app, scopes)
+        assert app.calls == 1
+        assert bodies == [b"call 1"] * 3
+        assert middleware.in_flight == {}
+
+        assert await request(middleware, scopes[0]) == b"call 2"
+
+    asyncio.run(scenario())
+
+def test_requests_with_different_keys_or_authorization_run_separately():
+    async def scenario():
+        app = SlowApp()
+        scopes = [
+            http_scope(),
+            http_scope(headers=[(b"accept", b"image/webp")]),
+            http_scope(headers=[(b"accept-encoding", b"gzip")]),
+            http_scope(headers=[(b"authorization", b"Bearer token")]),
+            http_scope(headers=[(b"authorization", b"Bearer token")]),
+            http_scope(path="/movies/1"),
+        ]
+        await concurrently(app, scopes)
+        assert app.calls == len(scopes)
+
+    asyncio.run(scenario())
+
+def test_leader_error_is_shared_with_followers():
+    async def scenario():
+        app = SlowApp(error=RuntimeError("boom"))
+        results, middleware = await concurrently(app, [http_scope(), http_scope()])
+        assert app.calls == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert middleware.in_flight == {}
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "DELETE"])
+def test_writes_are_never_coalesced(method):
+    scope = dict(http_scope(), method=method)
+    assert coalescing.request_key(scope) is None
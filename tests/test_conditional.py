@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB
+from conftest import create_movie, login
+
+async def backdate_movies(hours):
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(MovieDB).values(updated_at=datetime.utcnow() - timedelta(hours=hours)))
+        await session.commit()
+
+def test_list_not_modified_until_a_movie_changes(client, run):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "First")
+    run(backdate_movies, 1)
+
+    response = client.get("/movies/")
+    etag = response.headers["etag"]
+    assert client.get("/movies/", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/user/movies/{movie['id']}", data={"title": "Renamed"}, headers=headers)
+    assert client.get("/movies/", headers={"If-None-Match": etag}).status_code == 200
+
+def test_deleting_a_movie_invalidates_if_modified_since(client, run):
+    headers = login(client, "alice")
+    create_movie(client, headers, "Kept")
+    removed = create_movie(client, headers, "Removed")
+    run(backdate_movies, 1)
+
+    last_modified = client.get("/movies/").headers["last-modified"]
+    assert client.get("/movies/", headers={"If-Modified-Since": last_modified}).status_code == 304
+
+    assert client.delete(f"/user/movies/{removed['id']}", headers=headers).status_code == 200
+    response = client.get("/movies/", headers={"If-Modified-Since": last_modified})
+
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Kept"]
+    assert response.headers["last-modified"] != last_modified
@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, create_engine, event, inspect, text
+)
+
+from app.database import Base, add_missing_columns, add_missing_indexes, drop_superseded_indexes, upgrade_foreign_keys
+
+def baseline_metadata() -> MetaData:
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("username", String(50), unique=True, index=True, nullable=False),
+        Column("email", String(100), unique=True, index=True, nullable=False),
+        Column("hashed_password", String(200), nullable=False),
+        Column("is_active", Boolean, default=True),
+        Column("is_admin", Boolean, default=False),
+        Column("created_at", DateTime),
+        Column("last_login", DateTime, nullable=True),
+    )
+    Table(
+        "movies", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("title", String(200), nullable=False, index=True),
+        Column("director", String(100), nullable=False),
+        Column("year", Integer, nullable=True),
+        Column("genre", String(100), nullable=True),
+        Column("rating", Float, default=0.0, index=True),
+        Column("description", String(2000), nullable=True),
+        Column("duration", Integer, nullable=True),
+        Column("cost", Float, default=0.0),
+        Column("is_recommended", Boolean, default=False),
+        Column("photo_url", String(500)),
+        Column("created_at", DateTime),
+        Column("updated_at", DateTime),
+        Column("added_by", Integer, ForeignKey("users.id"), nullable=True),
+    )
+    Table(
+        "reviews", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("movie_id", Integer, ForeignKey("movies.id"), nullable=False),
+        Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+        Column("rating", Integer, nullable=False),
+        Column("comment", String(1000), nullable=True),
+        Column("created_at", DateTime, index=True),
+    )
+    return metadata
+
+def baseline_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    baseline_metadata().create_all(engine)
+    now = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, username, email, hashed_password, created_at) VALUES "
+            "(1, 'alice', 'alice@example.com', 'x', :now), (2, 'bob', 'bob@example.com', 'x', :now)"
+        ), {"now": now})
+        conn.execute(text(
+            "INSERT INTO movies (id, title, director, rating, created_at, updated_at, added_by) VALUES "
+            "(1, 'Kept', 'Director', 8.0, :now, :now, 1), (2, 'Removed', 'Director', 6.0, :now, :now, 1)"
+        ), {"now": now})
+        conn.execute(text(
+            "INSERT INTO reviews (id, movie_id, user_id, rating, comment, created_at) VALUES "
+            "(1, 1, 2, 4, 'good', :now), (2, 2, 2, 3, NULL, :now), (3, 99, 2, 5, 'orphan', :now)"
+        ), {"now": now})
+
+    @event.listens_for(engine, "connect")
+    def enable_foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    engine.dispose()
+    return engine
+
+def migrate(engine):
+    with engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        add_missing_columns(conn)
+        upgrade_foreign_keys(conn)
+        add_missing_indexes(conn)
+        drop_superseded_indexes(conn)
+
+def test_upgrade_foreign_keys_rebuilds_baseline_reviews_with_cascade(tmp_path):
+    engine = baseline_engine(tmp_path / "baseline.db")
+    migrate(engine)
+
+    inspector = inspect(engine)
+    foreign_keys = {fk["referred_table"]: fk["options"].get("ondelete") for fk in inspector.get_foreign_keys("reviews")}
+    assert foreign_keys == {"movies": "CASCADE", "users": "CASCADE"}
+    assert {index.name for index in Base.metadata.tables["reviews"].indexes} <= {
+        index["name"] for index in inspector.get_indexes("reviews")
+    }
+    assert not inspector.has_table("reviews__old")
+
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, movie_id, user_id, rating, comment FROM reviews ORDER BY id")).all()
+        assert [tuple(row) for row in rows] == [(1, 1, 2, 4, "good"), (2, 2, 2, 3, None)]
+
+        conn.execute(text("DELETE FROM movies WHERE id = 2"))
+        assert conn.execute(text("SELECT id FROM reviews")).scalars().all() == [1]
+        conn.execute(text("DELETE FROM users WHERE id = 2"))
+        assert conn.execute(text("SELECT count(*) FROM reviews")).scalar() == 0
+
+def test_upgrade_foreign_keys_is_a_no_op_on_current_schema(tmp_path):
+    engine = baseline_engine(tmp_path / "baseline.db")
+    migrate(engine)
+    root_page = "SELECT rootpage FROM sqlite_master WHERE type = 'table' AND name = 'reviews'"
+    with engine.begin() as conn:
+        before = conn.execute(text(root_page)).scalar()
+
+    migrate(engine)
+
+    with engine.begin() as conn:
+        assert conn.execute(text(root_page)).scalar() == before
+        assert conn.execute(text("SELECT count(*) FROM reviews")).scalar() == 2
+
+def test_migration_replaces_single_column_movie_indexes(tmp_path):
+    engine = baseline_engine(tmp_path / "baseline.db")
+    assert {"ix_movies_rating", "ix_movies_title"} <= {index["name"] for index in inspect(engine).get_indexes("movies")}
+
+    migrate(engine)
+
+    indexes = {index["name"] for index in inspect(engine).get_indexes("movies")}
+    assert not indexes & {"ix_movies_rating", "ix_movies_title"}
+    assert {index.name for index in Base.metadata.tables["movies"].indexes} <= indexes
@@ -0,0 +1,62 @@
+from app import events, jobs
+from conftest import create_movie, login
+
+def test_committed_writes_are_delivered_to_subscribers(client, run):
+    received, remote = [], []
+
+    async def record(event):
+        received.append(event)
+
+    async def record_remote(event):
+        remote.append(event)
+
+    events.subscribe(record, events.MoviesCreated, events.MovieUpdated)
+    events.subscribe(record_remote, remote_only=True)
+    try:
+        headers = login(client, "alice")
+        movie = create_movie(client, headers, "Published")
+        client.put(f"/user/movies/{movie['id']}", data={"title": "Renamed"}, headers=headers)
+        run(events.drain)
+
+        assert [type(event) for event in received] == [events.MoviesCreated, events.MovieUpdated]
+        assert received[0].movie_ids == [movie["id"]]
+        assert received[1].movie_id == movie["id"]
+        assert remote == []
+
+        foreign = events.decode(events.encode(events.MovieDeleted(movie_id=movie["id"], origin="other")))
+        run(events.deliver_remote, foreign)
+        run(events.deliver_remote, events.decode(events.encode(events.MovieDeleted(movie_id=movie["id"]))))
+        run(events.drain)
+
+        assert remote == [foreign]
+    finally:
+        events._subscribers[:] = [entry for entry in events._subscribers if entry[1] not in (record, record_remote)]
+
+def test_unknown_event_types_are_ignored():
+    assert events.decode('{"type": "Unknown", "event": {}}') is None
+
+def test_recompute_job_publishes_rescored_movies(client, run):
+    received = []
+
+    async def record(event):
+        received.append(event)
+
+    run(jobs.stop)
+    events.subscribe(record, events.MoviesRescored)
+    try:
+        owner = login(client, "alice")
+        reviewer = login(client, "bob")
+        movie = create_movie(client, owner, "Rescored")
+        review = client.post("/reviews/", json={"movie_id": movie["id"], "rating": 5}, headers=reviewer).json()
+        response = client.put(f"/reviews/{review['id']}", json={"rating": 1}, headers=reviewer)
+        assert response.status_code == 200, response.text
+        run(events.drain)
+        assert received == []
+
+        run(jobs.run_pending)
+        run(events.drain)
+
+        assert [event.movie_ids for event in received] == [[movie["id"]]]
+        assert client.get(f"/movies/{movie['id']}").json()["rating"] == 2.0
+    finally:
+        events._subscribers[:] = [entry for entry in events._subscribers if entry[1] is not record]
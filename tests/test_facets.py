@@ -0,0 +1,54 @@
+from app import facets, jobs
+from app.database import AsyncSessionLocal
+from conftest import create_movie, login
+
+async def maintained_and_grouped():
+    async with AsyncSessionLocal() as session:
+        return await facets.unfiltered_facets(session), await facets.filtered_facets(session, [])
+
+def assert_counts_match(run):
+    run(jobs.run_pending)
+    maintained, grouped = run(maintained_and_grouped)
+    assert maintained == grouped
+    return maintained
+
+def test_maintained_counts_match_group_by_after_writes(client, run):
+    run(jobs.stop)
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+
+    drama = create_movie(client, owner, "Drama", genre="Drama, Crime", year=1994, rating=9)
+    comedy = create_movie(client, owner, "Comedy", genre="Comedy", year=2003, rating=5)
+    create_movie(client, owner, "Untagged")
+    counts = assert_counts_match(run)
+    assert counts.total == 3
+    assert {item.value: item.count for item in counts.genre} == {"Crime": 1, "Drama": 1, "Comedy": 1}
+
+    client.put(f"/user/movies/{comedy['id']}", data={"genre": "Drama", "year": "1999"}, headers=owner)
+    counts = assert_counts_match(run)
+    assert {item.value: item.count for item in counts.year} == {"1990": 2}
+
+    review = client.post("/reviews/", json={"movie_id": drama["id"], "rating": 1}, headers=reviewer).json()
+    assert_counts_match(run)
+    client.put(f"/reviews/{review['id']}", json={"rating": 3}, headers=reviewer)
+    assert_counts_match(run)
+    client.delete(f"/reviews/{review['id']}", headers=reviewer)
+    assert_counts_match(run)
+
+    client.delete(f"/user/movies/{drama['id']}", headers=owner)
+    counts = assert_counts_match(run)
+    assert counts.total == 2
+    assert {item.value: item.count for item in counts.genre} == {"Drama": 1}
+
+def test_apply_deltas_inserts_and_increments_in_one_statement(client, run):
+    async def apply_twice():
+        async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+            await facets.apply_deltas(first, {("genre", "Western"): 1})
+            await first.commit()
+            await facets.apply_deltas(second, {("genre", "Western"): 2, ("genre", "Noir"): -1})
+            await second.commit()
+        async with AsyncSessionLocal() as session:
+            return await facets.unfiltered_facets(session)
+
+    counts = run(apply_twice)
+    assert [(item.value, item.count) for item in counts.genre] == [("Western", 3)]
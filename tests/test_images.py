@@ -0,0 +1,91 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app import images
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB
+from conftest import create_movie, login, png_bytes, wait_for
+
+RENDITIONS = {
+    "200": {"webp": "static/uploads/renditions/a_200.webp", "jpeg": "static/uploads/renditions/a_200.jpeg"},
+    "600": {"webp": "static/uploads/renditions/a_600.webp", "jpeg": "static/uploads/renditions/a_600.jpeg"},
+}
+
+def test_accepted_format_prefers_webp_only_when_advertised():
+    assert images.accepted_format("image/avif,image/webp,*/*") == "webp"
+    assert images.accepted_format("application/json") == "jpeg"
+    assert images.accepted_format("*/*") == "jpeg"
+    assert images.accepted_format(None) == "jpeg"
+
+def test_pick_rendition_uses_smallest_fitting_size_in_requested_format():
+    movie = SimpleNamespace(photo_url="static/uploads/a.png", photo_renditions=RENDITIONS)
+    assert images.pick_rendition(movie, 150, "webp") == RENDITIONS["200"]["webp"]
+    assert images.pick_rendition(movie, 300, "jpeg") == RENDITIONS["600"]["jpeg"]
+    assert images.pick_rendition(movie, 1000, "webp") == movie.photo_url
+    assert images.pick_rendition(movie, None, "webp") == movie.photo_url
+
+def test_sized_photo_url_follows_accept_header(client):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Poster", photo=png_bytes())
+    wait_for(lambda: client.get(f"/movies/{movie['id']}").json()["photo_renditions"])
+
+    webp = client.get(f"/movies/{movie['id']}?size=200", headers={"Accept": "application/json, image/webp"})
+    jpeg = client.get(f"/movies/{movie['id']}?size=200", headers={"Accept": "application/json"})
+
+    assert webp.json()["photo_url"].endswith("_200.webp")
+    assert jpeg.json()["photo_url"].endswith("_200.jpeg")
+    assert webp.headers["etag"] != jpeg.headers["etag"]
+    assert "Accept" in jpeg.headers["vary"]
+
+    listed = client.get("/movies/?size=200&fields=title,photo_url", headers={"Accept": "application/json"})
+    assert listed.json()[0]["photo_url"].endswith("_200.jpeg")
+
+def test_failed_render_is_recorded_and_skipped_by_backfill(client, run, monkeypatch):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Broken")
+    broken_path = "static/uploads/broken.png"
+    with open(broken_path, "wb") as file:
+        file.write(b"not an image")
+
+    async def point_to_broken_file():
+        async with AsyncSessionLocal() as session:
+            db_movie = await session.get(MovieDB, movie["id"])
+            db_movie.photo_url = broken_path
+            await session.commit()
+
+    async def failed_at():
+        async with AsyncSessionLocal() as session:
+            return await session.scalar(select(MovieDB.photo_render_failed_at).where(MovieDB.id == movie["id"]))
+
+    run(point_to_broken_file)
+    run(images.process_movie_photo, movie["id"], broken_path)
+    assert run(failed_at) is not None
+
+    attempts = []
+
+    async def record_attempt(movie_id, photo_path):
+        attempts.append(movie_id)
+
+    monkeypatch.setattr(images, "process_movie_photo", record_attempt)
+    run(images.backfill_renditions)
+    assert attempts == []
+    assert os.path.exists(broken_path)
+
+def test_shutdown_cancels_backfill_without_waiting(client, run, monkeypatch):
+    async def endless_backfill():
+        await asyncio.sleep(3600)
+
+    async def schedule_and_shut_down():
+        images.schedule_backfill()
+        task = images._backfill_task
+        await asyncio.wait_for(images.shutdown(), 1)
+        return task
+
+    monkeypatch.setattr(images, "backfill_renditions", endless_backfill)
+    task = run(schedule_and_shut_down)
+
+    assert task.cancelled()
+    assert images._backfill_task is None
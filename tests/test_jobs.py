@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy import select, update
+
+from app import jobs
+from app.database import AsyncSessionLocal
+from app.schemas import JobDB
+
+@pytest.fixture
+def queue(client, run, monkeypatch):
+    run(jobs.stop)
+    monkeypatch.setattr(jobs, "RETRY_BASE_SECONDS", 0)
+    calls = []
+
+    async def flaky(db, payload):
+        calls.append(payload)
+        if len(calls) <= payload.get("failures", 0):
+            raise RuntimeError(f"попытка {len(calls)}")
+
+    jobs.register("test_flaky", flaky)
+    yield calls
+    jobs._handlers.pop("test_flaky", None)
+
+async def enqueue(payload, key=None):
+    async with AsyncSessionLocal() as session:
+        job_id = await jobs.enqueue(session, "test_flaky", payload, idempotency_key=key)
+        await session.commit()
+        return job_id
+
+async def job_rows():
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(JobDB.id, JobDB.status, JobDB.attempts, JobDB.last_error).where(JobDB.kind == "test_flaky").order_by(JobDB.id)
+        )
+        return [tuple(row) for row in result.all()]
+
+async def set_status(job_id, status):
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(JobDB).where(JobDB.id == job_id).values(status=status))
+        await session.commit()
+
+def test_pending_job_is_enqueued_once_per_key(queue, run):
+    first = run(enqueue, {}, "same")
+    assert run(enqueue, {}, "same") is None
+    assert run(enqueue, {}, "other") is not None
+
+    run(set_status, first, "running")
+    assert run(enqueue, {}, "same") is not None
+    assert [status for _, status, _, _ in run(job_rows)] == ["running", "pending", "pending"]
+
+def test_failed_job_is_retried_until_it_succeeds(queue, run):
+    job_id = run(enqueue, {"failures": 2})
+
+    assert run(jobs.run_pending) == 3
+    assert queue == [{"failures": 2}] * 3
+    assert run(job_rows) == [(job_id, "done", 3, None)]
+
+def test_job_fails_after_max_attempts(queue, run, monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_ATTEMPTS", 2)
+    job_id = run(enqueue, {"failures": 5})
+
+    assert run(jobs.run_pending) == 2
+    assert run(job_rows) == [(job_id, "failed", 2, "RuntimeError: попытка 2")]
+
+def test_retry_is_dropped_when_same_key_is_pending(queue, run):
+    async def claim():
+        async with AsyncSessionLocal() as session:
+            return await jobs.claim(session)
+
+    running = run(enqueue, {"failures": 1}, "same")
+    job = run(claim)
+    pending = run(enqueue, {}, "same")
+    run(jobs.run_job, job)
+
+    assert run(job_rows) == [(running, "done", 1, "RuntimeError: попытка 1"), (pending, "pending", 0, None)]
+
+def test_recover_requeues_interrupted_jobs_once_per_key(queue, run):
+    lone = run(enqueue, {})
+    older = run(enqueue, {}, "same")
+    run(set_status, lone, "running")
+    run(set_status, older, "running")
+    newer = run(enqueue, {}, "same")
+    run(set_status, newer, "running")
+    shadowed = run(enqueue, {}, "other")
+    run(set_status, shadowed, "running")
+    waiting = run(enqueue, {}, "other")
+
+    run(jobs.recover)
+
+    assert [(job_id, status) for job_id, status, _, _ in run(job_rows)] == [
+        (lone, "pending"),
+        (older, "done"),
+        (newer, "pending"),
+        (shadowed, "done"),
+        (waiting, "pending"),
+    ]
+    assert run(jobs.run_pending) == 3
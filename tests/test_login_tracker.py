@@ -0,0 +1,59 @@
+import asyncio
+
+from sqlalchemy import select
+
+from app import login_tracker
+from app.database import AsyncSessionLocal
+from app.schemas import UserDB
+from conftest import admin_login, login
+
+async def stored_last_login(username: str):
+    async with AsyncSessionLocal() as session:
+        return await session.scalar(select(UserDB.last_login).where(UserDB.username == username))
+
+def listed_last_login(client, headers, username: str):
+    users = client.get("/admin/users/", headers=headers).json()
+    return next(user["last_login"] for user in users if user["username"] == username)
+
+def test_logins_are_buffered_and_flushed_in_one_batch(client, run):
+    login(client, "alice")
+    login(client, "bob")
+    admin = admin_login(client)
+
+    assert run(stored_last_login, "alice") is None
+    assert listed_last_login(client, admin, "alice") is not None
+
+    batches = login_tracker.stats["batches"]
+    assert run(login_tracker.flush) == 3
+    assert login_tracker.stats["batches"] == batches + 1
+    assert run(stored_last_login, "alice") is not None
+    assert run(stored_last_login, "bob") is not None
+    assert run(login_tracker.flush) == 0
+
+def test_pending_logins_are_flushed_on_shutdown(client, run):
+    login(client, "alice")
+    assert run(stored_last_login, "alice") is None
+
+    client.__exit__(None, None, None)
+    client.__enter__()
+
+    assert run(stored_last_login, "alice") is not None
+
+def test_cancelled_flush_keeps_the_batch(client, run, monkeypatch):
+    login(client, "alice")
+
+    def cancelled_session():
+        raise asyncio.CancelledError()
+
+    async def cancelled_flush():
+        try:
+            await login_tracker.flush()
+        except asyncio.CancelledError:
+            return True
+
+    monkeypatch.setattr(login_tracker, "AsyncSessionLocal", cancelled_session)
+    assert run(cancelled_flush)
+    monkeypatch.undo()
+
+    assert run(login_tracker.flush) == 1
+    assert run(stored_last_login, "alice") is not None
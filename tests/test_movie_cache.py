@@ -0,0 +1,69 @@
+from app import jobs, movie_cache
+from conftest import create_movie, login
+
+def authorized_get(client, headers, movie_id):
+    return client.get(f"/movies/{movie_id}", headers=headers)
+
+def test_snapshot_is_cached_and_dropped_after_update_and_delete(client, run):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Original")
+
+    assert authorized_get(client, headers, movie["id"]).json()["title"] == "Original"
+    assert run(movie_cache.get, movie["id"])["title"] == "Original"
+
+    response = client.put(f"/user/movies/{movie['id']}", data={"title": "Renamed"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert run(movie_cache.get, movie["id"]) is None
+    assert authorized_get(client, headers, movie["id"]).json()["title"] == "Renamed"
+    assert run(movie_cache.get, movie["id"])["title"] == "Renamed"
+
+    assert client.delete(f"/user/movies/{movie['id']}", headers=headers).status_code == 200
+    assert run(movie_cache.get, movie["id"]) is None
+    assert authorized_get(client, headers, movie["id"]).status_code == 404
+
+def test_new_review_refreshes_cached_rating(client, run):
+    run(jobs.stop)
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    movie = create_movie(client, owner, "Reviewed")
+    authorized_get(client, owner, movie["id"])
+
+    response = client.post("/reviews/", json={"movie_id": movie["id"], "rating": 4}, headers=reviewer)
+    assert response.status_code == 200, response.text
+
+    assert run(movie_cache.get, movie["id"]) is None
+    assert authorized_get(client, owner, movie["id"]).json()["rating"] == 0.0
+
+    run(jobs.run_pending)
+    assert run(movie_cache.get, movie["id"]) is None
+    assert authorized_get(client, owner, movie["id"]).json()["rating"] == 8.0
+
+def test_snapshot_loaded_before_invalidation_is_not_stored(client, run):
+    loaded_generation = run(movie_cache.generation, 42)
+    run(movie_cache.invalidate, 42)
+    run(movie_cache.put, 42, {"id": 42, "title": "Stale"}, loaded_generation)
+
+    assert run(movie_cache.get, 42) is None
+
+    run(movie_cache.put, 42, {"id": 42, "title": "Fresh"}, run(movie_cache.generation, 42))
+    assert run(movie_cache.get, 42)["title"] == "Fresh"
+
+def test_invalidation_by_another_worker_rejects_stale_snapshot(client, run):
+    loaded_generation = run(movie_cache.generation, 42)
+    run(movie_cache.backend.invalidate, movie_cache.cache_key(42))
+    run(movie_cache.put, 42, {"id": 42, "title": "Stale"}, loaded_generation)
+
+    assert run(movie_cache.get, 42) is None
+
+def test_generations_are_bounded_without_admitting_stale_snapshots(client, run):
+    movie_cache.configure(movie_cache.MemoryBackend(max_generations=2))
+    loaded_generation = run(movie_cache.generation, 42)
+    for movie_id in (42, 43, 44, 45):
+        run(movie_cache.invalidate, movie_id)
+
+    assert list(movie_cache.backend.generations) == ["movie:44", "movie:45"]
+    run(movie_cache.put, 42, {"id": 42, "title": "Stale"}, loaded_generation)
+    assert run(movie_cache.get, 42) is None
+
+    run(movie_cache.put, 42, {"id": 42, "title": "Fresh"}, run(movie_cache.generation, 42))
+    assert run(movie_cache.get, 42)["title"] == "Fresh"
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import sqlite
+
+from app import crud, facets
+from app.database import Base
+from app.schemas import MovieDB, MovieReviewSummaryDB
+
+FILTERS = [
+    {},
+    {"title": "Matrix"},
+    {"genre": "Drama"},
+    {"min_rating": 7.0},
+    {"title": "Matrix", "genre": "Drama", "min_rating": 7.0},
+]
+SORT_INDEXES = {
+    "rating": "ix_movies_rating_id",
+    "-rating": "ix_movies_rating_id",
+    "-weighted_score": "ix_movies_weighted_score_id",
+    "year": "ix_movies_year_id",
+    "-created_at": "ix_movies_created_at_id",
+    "title": "ix_movies_title_id",
+}
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.connect() as conn:
+        yield conn
+    engine.dispose()
+
+def query_plan(connection, query) -> str:
+    sql = query.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    return "\n".join(row[3] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+def catalog_query(sort, filters, with_summary=False):
+    conditions = facets.filter_conditions(filters.get("title"), filters.get("genre"), filters.get("min_rating"))
+    query = select(MovieDB).where(*conditions)
+    if with_summary:
+        query = query.add_columns(MovieReviewSummaryDB).outerjoin(
+            MovieReviewSummaryDB, MovieReviewSummaryDB.movie_id == MovieDB.id
+        )
+    return crud.apply_movie_sort(query, sort).offset(20).limit(20)
+
+def test_every_sort_has_a_matching_index():
+    assert set(SORT_INDEXES) == set(crud.MOVIE_SORTS)
+
+@pytest.mark.parametrize("with_summary", [False, True])
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("sort", SORT_INDEXES)
+def test_sorted_catalog_is_index_ordered(connection, sort, filters, with_summary):
+    plan = query_plan(connection, catalog_query(sort, filters, with_summary))
+
+    assert f"USING INDEX {SORT_INDEXES[sort]}" in plan, plan
+    assert "USE TEMP B-TREE" not in plan, plan
+
+def test_min_rating_filter_is_an_index_range_search(connection):
+    plan = query_plan(connection, catalog_query(None, {"min_rating": 7.0}))
+
+    assert "SEARCH movies USING INDEX ix_movies_rating_id (rating>?)" in plan, plan
+
+def test_title_and_rating_lookups_still_use_composite_indexes(connection):
+    by_title = query_plan(connection, select(MovieDB.id).where(MovieDB.title == "Matrix"))
+    by_rating = query_plan(connection, select(MovieDB.id).where(MovieDB.rating == 8.0))
+
+    assert "USING COVERING INDEX ix_movies_title_id (title=?)" in by_title, by_title
+    assert "USING COVERING INDEX ix_movies_rating_id (rating=?)" in by_rating, by_rating
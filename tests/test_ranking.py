@@ -0,0 +1,50 @@
+from app import jobs, ranking
+from app.database import AsyncSessionLocal
+from conftest import create_movie, login
+
+async def rescore_if_drifted():
+    async with AsyncSessionLocal() as session:
+        return await ranking.rescore_if_drifted(session)
+
+def post_review(client, headers, movie_id, rating):
+    response = client.post("/reviews/", json={"movie_id": movie_id, "rating": rating}, headers=headers)
+    assert response.status_code == 200, response.text
+
+def restart(client):
+    client.__exit__(None, None, None)
+    client.__enter__()
+
+def test_scored_mean_survives_restart(client, run):
+    headers = login(client, "alice")
+    create_movie(client, headers, "Movie")
+
+    assert run(rescore_if_drifted)
+    restart(client)
+    assert not run(rescore_if_drifted)
+
+def test_drift_rescores_only_changed_movies_and_invalidates_caches(client, run):
+    run(jobs.stop)
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    unreviewed = create_movie(client, owner, "Unreviewed")
+    reviewed = create_movie(client, owner, "Reviewed")
+    assert run(rescore_if_drifted)
+
+    client.get(f"/movies/{unreviewed['id']}")
+    cached = client.get(f"/movies/{unreviewed['id']}")
+    assert cached.headers["x-cache"] == "HIT"
+    assert cached.json()["weighted_score"] == ranking.EMPTY_MEAN
+
+    post_review(client, reviewer, reviewed["id"], 2)
+    run(jobs.run_pending)
+    reviewed_before = client.get(f"/movies/{reviewed['id']}").json()
+    assert run(rescore_if_drifted)
+
+    fresh = client.get(f"/movies/{unreviewed['id']}")
+    assert fresh.headers["x-cache"] == "MISS"
+    assert fresh.json()["weighted_score"] == 4.0
+    assert fresh.json()["updated_at"] > cached.json()["updated_at"]
+
+    reviewed_after = client.get(f"/movies/{reviewed['id']}").json()
+    assert reviewed_after["weighted_score"] == reviewed_before["weighted_score"]
+    assert reviewed_after["updated_at"] == reviewed_before["updated_at"]
@@ -0,0 +1,58 @@
+from conftest import create_movie, login
+
+def post_review(client, headers, movie_id, rating):
+    response = client.post("/reviews/", json={"movie_id": movie_id, "rating": rating}, headers=headers)
+    assert response.status_code == 200, response.text
+
+def test_anonymous_reads_are_cached_until_the_movie_changes(client):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Original")
+    path = f"/movies/{movie['id']}"
+
+    assert client.get(path).headers["x-cache"] == "MISS"
+    cached = client.get(path)
+    assert cached.headers["x-cache"] == "HIT"
+    assert cached.json()["title"] == "Original"
+    assert "x-cache" not in client.get(path, headers=headers).headers
+
+    client.put(path.replace("/movies/", "/user/movies/"), data={"title": "Renamed"}, headers=headers)
+    updated = client.get(path)
+    assert updated.headers["x-cache"] == "MISS"
+    assert updated.json()["title"] == "Renamed"
+    assert client.get(path).headers["x-cache"] == "HIT"
+
+def test_catalog_and_reviews_are_purged_after_writes(client):
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    kept = create_movie(client, owner, "Kept")
+    removed = create_movie(client, owner, "Removed")
+    reviews_path = f"/movies/{kept['id']}/reviews"
+
+    client.get("/movies/")
+    client.get(reviews_path)
+    assert client.get("/movies/").headers["x-cache"] == "HIT"
+    assert client.get(reviews_path).headers["x-cache"] == "HIT"
+
+    post_review(client, reviewer, kept["id"], 5)
+    reviews = client.get(reviews_path)
+    assert reviews.headers["x-cache"] == "MISS"
+    assert [review["rating"] for review in reviews.json()] == [5]
+
+    client.get("/movies/")
+    assert client.delete(f"/user/movies/{removed['id']}", headers=owner).status_code == 200
+    catalog = client.get("/movies/")
+    assert catalog.headers["x-cache"] == "MISS"
+    assert [movie["title"] for movie in catalog.json()] == ["Kept"]
+
+def test_cached_entry_answers_conditional_and_compressed_requests(client):
+    headers = login(client, "alice")
+    for index in range(20):
+        create_movie(client, headers, f"Movie {index}", description="Описание " * 20)
+
+    first = client.get("/movies/")
+    assert client.get("/movies/", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    compressed = client.get("/movies/", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["x-cache"] == "HIT"
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == first.json()
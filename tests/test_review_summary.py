@@ -0,0 +1,83 @@
+from sqlalchemy import delete, select
+
+from app import review_summary
+from app.database import AsyncSessionLocal
+from app.schemas import MovieReviewSummaryDB
+from conftest import admin_login, create_movie, login
+
+async def stored_summary(movie_id):
+    async with AsyncSessionLocal() as session:
+        summary = await session.scalar(select(MovieReviewSummaryDB).where(MovieReviewSummaryDB.movie_id == movie_id))
+        return review_summary.to_model(summary)
+
+async def rebuilt_summary(movie_id):
+    async with AsyncSessionLocal() as session:
+        await review_summary.rebuild(session, [movie_id])
+        summary = await session.scalar(select(MovieReviewSummaryDB).where(MovieReviewSummaryDB.movie_id == movie_id))
+        result = review_summary.to_model(summary)
+        await session.rollback()
+        return result
+
+async def drop_summaries():
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(MovieReviewSummaryDB))
+        await session.commit()
+
+async def rebuild_missing():
+    async with AsyncSessionLocal() as session:
+        await review_summary.rebuild_missing(session)
+
+def assert_maintained(run, movie_id):
+    summary = run(stored_summary, movie_id)
+    assert summary == run(rebuilt_summary, movie_id)
+    return summary
+
+def test_summary_is_maintained_across_review_writes(client, run):
+    owner = login(client, "alice")
+    reviewers = [login(client, name) for name in ("bob", "carol", "dave")]
+    movie = create_movie(client, owner, "Summarized")
+
+    reviews = [
+        client.post("/reviews/", json={"movie_id": movie["id"], "rating": rating, "comment": f"Отзыв {rating}"}, headers=headers).json()
+        for rating, headers in zip((5, 3, 3), reviewers)
+    ]
+    summary = assert_maintained(run, movie["id"])
+    assert summary.review_count == 3
+    assert summary.histogram == {1: 0, 2: 0, 3: 2, 4: 0, 5: 1}
+    assert summary.latest_review_ids == [review["id"] for review in reversed(reviews)]
+    assert summary.latest_snippet == "Отзыв 3"
+
+    client.put(f"/reviews/{reviews[1]['id']}", json={"rating": 1}, headers=reviewers[1])
+    summary = assert_maintained(run, movie["id"])
+    assert summary.histogram == {1: 1, 2: 0, 3: 1, 4: 0, 5: 1}
+
+    client.delete(f"/reviews/{reviews[2]['id']}", headers=reviewers[2])
+    summary = assert_maintained(run, movie["id"])
+    assert summary.review_count == 2
+    assert summary.latest_review_ids == [reviews[1]["id"], reviews[0]["id"]]
+    assert summary.latest_snippet == "Отзыв 3"
+
+    response = client.post("/admin/reviews/bulk-delete", json={"ids": [reviews[0]["id"]]}, headers=admin_login(client))
+    assert response.status_code == 200, response.text
+    summary = assert_maintained(run, movie["id"])
+    assert summary.review_count == 1
+    assert summary.histogram == {1: 1, 2: 0, 3: 0, 4: 0, 5: 0}
+    assert summary.latest_review_ids == [reviews[1]["id"]]
+
+def test_rebuild_missing_restores_dropped_summaries(client, run):
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    reviewed = [create_movie(client, owner, f"Movie {index}") for index in range(3)]
+    unreviewed = create_movie(client, owner, "Unreviewed")
+    for index, movie in enumerate(reviewed):
+        client.post("/reviews/", json={"movie_id": movie["id"], "rating": index + 2}, headers=reviewer)
+    expected = [run(stored_summary, movie["id"]) for movie in reviewed]
+
+    run(drop_summaries)
+    assert run(stored_summary, reviewed[0]["id"]).review_count == 0
+    run(rebuild_missing)
+
+    assert [run(stored_summary, movie["id"]) for movie in reviewed] == expected
+    assert run(stored_summary, unreviewed["id"]) == review_summary.to_model(None)
+    included = client.get(f"/movies/{reviewed[2]['id']}", params={"include": "review_summary"}).json()
+    assert included["review_summary"]["histogram"]["4"] == 1
@@ -0,0 +1,86 @@
+from app import models, routes
+from conftest import admin_login, create_movie, login
+
+def post_review(client, headers, movie_id, rating, comment=None):
+    response = client.post("/reviews/", json={"movie_id": movie_id, "rating": rating, "comment": comment}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_fast_review_rows_match_validated_response(client, monkeypatch):
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    movie = create_movie(client, owner, "Reviewed")
+    post_review(client, reviewer, movie["id"], 4, "Хорошо")
+    admin = admin_login(client)
+
+    requests = [
+        (f"/movies/{movie['id']}/reviews", {}, models.ReviewWithUserResponse),
+        ("/user/reviews-with-details/", reviewer, models.ReviewWithDetailsResponse),
+        ("/admin/reviews-with-details/", admin, models.ReviewWithDetailsResponse),
+    ]
+    for path, headers, model in requests:
+        monkeypatch.setattr(routes, "FAST_JSON_ROWS", True)
+        fast = client.get(path, headers=headers)
+        monkeypatch.setattr(routes, "FAST_JSON_ROWS", False)
+        validated = client.get(path, headers=headers)
+
+        assert fast.status_code == validated.status_code == 200
+        assert fast.json() == validated.json()
+        assert set(fast.json()[0]) == set(model.model_fields)
+
+def test_reviews_with_details_pages_by_cursor_without_gaps(client):
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    created = [post_review(client, reviewer, create_movie(client, owner, f"Movie {index}")["id"], 3)["id"] for index in range(5)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/user/reviews-with-details/", params=params, headers=reviewer)
+        assert response.status_code == 200, response.text
+        seen += [review["id"] for review in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+
+    assert seen == sorted(created, reverse=True)
+    invalid = client.get("/user/reviews-with-details/", params={"cursor": "???"}, headers=reviewer)
+    assert invalid.status_code == 422
+
+def test_review_previews_are_latest_first_and_limited_per_movie(client):
+    owner = login(client, "alice")
+    reviewers = [login(client, name) for name in ("bob", "carol", "dave")]
+    busy = create_movie(client, owner, "Busy")
+    quiet = create_movie(client, owner, "Quiet")
+    empty = create_movie(client, owner, "Empty")
+    busy_reviews = [post_review(client, headers, busy["id"], 4, f"Отзыв {index}")["id"] for index, headers in enumerate(reviewers)]
+    quiet_review = post_review(client, reviewers[0], quiet["id"], 2)["id"]
+
+    response = client.get("/movies/reviews-preview", params={"ids": f"{empty['id']},{busy['id']},{quiet['id']},{busy['id']}", "per_movie": 2})
+
+    assert response.status_code == 200, response.text
+    previews = response.json()
+    assert [preview["movie_id"] for preview in previews] == [empty["id"], busy["id"], quiet["id"]]
+    assert [(preview["total"], [review["id"] for review in preview["reviews"]]) for preview in previews] == [
+        (0, []),
+        (3, busy_reviews[:0:-1]),
+        (1, [quiet_review]),
+    ]
+    assert previews[1]["reviews"][0]["username"] == "dave"
+
+    for ids in ("", "1,x", ",".join(str(index) for index in range(1, 102))):
+        assert client.get("/movies/reviews-preview", params={"ids": ids}).status_code == 422
+
+def test_admin_reviews_reject_skip_with_cursor(client):
+    owner = login(client, "alice")
+    reviewer = login(client, "bob")
+    for index in range(3):
+        post_review(client, reviewer, create_movie(client, owner, f"Movie {index}")["id"], 3)
+    admin = admin_login(client)
+
+    first = client.get("/admin/reviews-with-details/", params={"limit": 1}, headers=admin)
+    cursor = first.headers["x-next-cursor"]
+
+    assert client.get("/admin/reviews-with-details/", params={"skip": 1, "cursor": cursor}, headers=admin).status_code == 422
+    assert client.get("/admin/reviews-with-details/", params={"skip": 1}, headers=admin).status_code == 200
+    assert client.get("/admin/reviews-with-details/", params={"cursor": cursor}, headers=admin).status_code == 200
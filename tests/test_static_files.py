@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import os
+
+import brotli
+import pytest
+
+from app import static_files
+
+@pytest.fixture
+def static_file():
+    created = []
+
+    def write(name: str, data: bytes) -> str:
+        path = os.path.join("static", name)
+        with open(path, "wb") as buffer:
+            buffer.write(data)
+        created.append(path)
+        return path
+
+    yield write
+    for path in created:
+        for suffix in ("", ".br", ".gz"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+def test_content_hashed_files_are_immutable_with_strong_etag(client, static_file):
+    data = b"poster bytes"
+    digest = hashlib.sha256(data).hexdigest()
+    static_file(f"uploads/{digest}.jpg", data)
+
+    response = client.get(f"/static/uploads/{digest}.jpg")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == static_files.IMMUTABLE_CACHE_CONTROL
+    assert response.headers["etag"] == f'"{digest}"'
+
+    cached = client.get(f"/static/uploads/{digest}.jpg", headers={"If-None-Match": f'"{digest}"'})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+def test_other_files_revalidate_with_weak_etag(client, static_file):
+    static_file("plain.txt", b"plain text")
+
+    response = client.get("/static/plain.txt")
+    etag = response.headers["etag"]
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == static_files.REVALIDATE_CACHE_CONTROL
+    assert etag.startswith('W/"')
+    assert client.get("/static/plain.txt", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/static/plain.txt", headers={"If-None-Match": etag[2:]}).status_code == 304
+    assert client.get("/static/plain.txt", headers={"If-None-Match": '"other"'}).status_code == 200
+
+def test_range_requests_honor_if_range(client, static_file):
+    data = bytes(range(100))
+    digest = hashlib.sha256(data).hexdigest()
+    static_file(f"uploads/{digest}.jpg", data)
+    static_file("ranged.bin", data)
+    path = f"/static/uploads/{digest}.jpg"
+
+    partial = client.get(path, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 10-19/100"
+    assert partial.content == data[10:20]
+
+    suffix = client.get(path, headers={"Range": "bytes=-5", "If-Range": f'"{digest}"'})
+    assert suffix.status_code == 206
+    assert suffix.content == data[-5:]
+
+    changed = client.get(path, headers={"Range": "bytes=10-19", "If-Range": '"other"'})
+    assert changed.status_code == 200
+    assert changed.content == data
+
+    unsatisfiable = client.get(path, headers={"Range": "bytes=200-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */100"
+
+    weak_etag = client.get("/static/ranged.bin").headers["etag"]
+    weak = client.get("/static/ranged.bin", headers={"Range": "bytes=0-9", "If-Range": weak_etag})
+    assert weak.status_code == 200
+    assert weak.content == data
+
+def test_precompressed_variants_are_negotiated(client, static_file):
+    data = b"body { color: red; }\n" * 200
+    path = static_file("site.css", data)
+    static_files.precompress_file(path)
+
+    brotli_response = client.get("/static/site.css", headers={"Accept-Encoding": "gzip, br"})
+    assert brotli_response.headers["content-encoding"] == "br"
+    assert brotli_response.headers["vary"] == "Accept-Encoding"
+    assert brotli.decompress(open(path + ".br", "rb").read()) == data
+    assert brotli_response.content == data
+
+    gzip_response = client.get("/static/site.css", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert gzip_response.headers["content-encoding"] == "gzip"
+    assert brotli_response.headers["etag"] != gzip_response.headers["etag"]
+
+    identity = client.get("/static/site.css", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.content == data
+    assert identity.headers["accept-ranges"] == "bytes"
+    assert gzip.decompress(open(path + ".gz", "rb").read()) == data
@@ -0,0 +1,87 @@
+import os
+
+from sqlalchemy import select, update
+
+from app import storage
+from app.database import AsyncSessionLocal
+from app.schemas import PhotoFileDB
+from conftest import create_movie, login, png_bytes, wait_for
+
+async def ref_count(path):
+    async with AsyncSessionLocal() as session:
+        return await session.scalar(select(PhotoFileDB.ref_count).where(PhotoFileDB.path == path))
+
+async def set_ref_count(path, value):
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(PhotoFileDB).where(PhotoFileDB.path == path).values(ref_count=value))
+        await session.commit()
+
+async def purge(paths):
+    async with AsyncSessionLocal() as session:
+        await storage.purge_unreferenced(session, paths)
+
+async def sync():
+    async with AsyncSessionLocal() as session:
+        await storage.sync_ref_counts(session)
+
+def test_shared_photo_is_removed_only_after_last_reference(client, run, monkeypatch):
+    monkeypatch.setattr(storage, "PURGE_GRACE_SECONDS", 0)
+    headers = login(client, "alice")
+    photo = png_bytes()
+    first = create_movie(client, headers, "First", photo=photo)
+    second = create_movie(client, headers, "Second", photo=photo)
+    path = first["photo_url"]
+
+    assert second["photo_url"] == path
+    assert run(ref_count, path) == 2
+
+    assert client.delete(f"/user/movies/{first['id']}", headers=headers).status_code == 200
+    wait_for(lambda: run(ref_count, path) == 1)
+    assert os.path.exists(path)
+
+    assert client.delete(f"/user/movies/{second['id']}", headers=headers).status_code == 200
+    wait_for(lambda: not os.path.exists(path))
+    assert run(ref_count, path) is None
+
+def test_purge_keeps_photo_reacquired_before_delete(client, run):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Poster", photo=png_bytes())
+    path = movie["photo_url"]
+
+    run(purge, [path])
+
+    assert os.path.exists(path)
+    assert run(ref_count, path) == 1
+
+def test_purge_keeps_recently_reused_blob(client, run, monkeypatch):
+    headers = login(client, "alice")
+    photo = png_bytes()
+    movie = create_movie(client, headers, "Poster", photo=photo)
+    path = movie["photo_url"]
+    run(set_ref_count, path, 0)
+
+    run(purge, [path])
+    assert os.path.exists(path)
+    assert run(ref_count, path) is None
+
+    again = create_movie(client, headers, "Again", photo=photo)
+    assert again["photo_url"] == path
+    assert run(ref_count, path) == 1
+
+    monkeypatch.setattr(storage, "PURGE_GRACE_SECONDS", 0)
+    run(set_ref_count, path, 0)
+    run(purge, [path])
+    assert not os.path.exists(path)
+
+def test_sync_ref_counts_corrects_stale_counts(client, run):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Poster", photo=png_bytes())
+    path = movie["photo_url"]
+
+    run(set_ref_count, path, 5)
+    run(sync)
+    assert run(ref_count, path) == 1
+
+    run(set_ref_count, path, 0)
+    run(sync)
+    assert run(ref_count, path) == 1
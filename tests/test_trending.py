@@ -0,0 +1,53 @@
+import pytest
+
+from app import trending
+from app.database import AsyncSessionLocal
+from conftest import admin_login, create_movie, login
+
+async def refresh(full=False):
+    async with AsyncSessionLocal() as session:
+        return await trending.refresh(session, full)
+
+def post_review(client, headers, movie_id, rating):
+    response = client.post("/reviews/", json={"movie_id": movie_id, "rating": rating}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def trending_counts(client):
+    return {
+        movie["title"]: (movie["trending_review_count"], movie["trending_score"])
+        for movie in client.get("/movies/trending?window=24h").json()
+    }
+
+def restart(client):
+    client.__exit__(None, None, None)
+    client.__enter__()
+
+def test_incremental_refresh_after_restart_matches_rebuild(client, run):
+    owner = login(client, "alice")
+    bob = login(client, "bob")
+    carol = login(client, "carol")
+    popular = create_movie(client, owner, "Popular")
+    other = create_movie(client, owner, "Other")
+    bob_review = post_review(client, bob, popular["id"], 5)
+    carol_review = post_review(client, carol, popular["id"], 4)
+    removed_review = post_review(client, carol, other["id"], 3)
+    assert run(refresh, True)
+    assert {title: count for title, (count, _) in trending_counts(client).items()} == {"Popular": 2, "Other": 1}
+
+    client.put(f"/reviews/{carol_review['id']}", json={"rating": 1}, headers=carol)
+    client.delete(f"/reviews/{removed_review['id']}", headers=carol)
+    client.delete(f"/admin/users/{bob_review['user_id']}", headers=admin_login(client))
+    fresh = create_movie(client, owner, "Fresh")
+    post_review(client, carol, fresh["id"], 5)
+    restart(client)
+
+    assert run(refresh)
+    incremental = trending_counts(client)
+    assert {title: count for title, (count, _) in incremental.items()} == {"Popular": 1, "Fresh": 1}
+
+    assert run(refresh, True)
+    rebuilt = trending_counts(client)
+    for title, (count, score) in rebuilt.items():
+        assert incremental[title][0] == count
+        assert incremental[title][1] == pytest.approx(score, rel=1e-4)
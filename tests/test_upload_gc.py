@@ -0,0 +1,89 @@
+import os
+import shutil
+import time
+
+import pytest
+from sqlalchemy import update
+
+from app import upload_gc
+from app.database import AsyncSessionLocal
+from app.schemas import MovieDB
+from conftest import create_movie, login
+
+@pytest.fixture
+def uploads(client):
+    shutil.rmtree(upload_gc.UPLOADS_DIR, ignore_errors=True)
+    os.makedirs(upload_gc.UPLOADS_DIR)
+
+    def write(path: str, age_hours: float = 48, data: bytes = b"photo") -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as buffer:
+            buffer.write(data)
+        mtime = time.time() - age_hours * 3600
+        os.utime(path, (mtime, mtime))
+        return path
+
+    return write
+
+async def set_photo_url(movie_id, photo_url):
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(MovieDB).where(MovieDB.id == movie_id).values(photo_url=photo_url))
+        await session.commit()
+
+def test_orphans_past_the_grace_period_are_deleted(client, run, uploads):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Poster")
+    referenced = uploads("static/uploads/ab/cd/referenced.jpg")
+    orphan = uploads("static/uploads/ab/cd/orphan.jpg", data=b"orphaned")
+    recent = uploads("static/uploads/ab/cd/recent.jpg", age_hours=1)
+    run(set_photo_url, movie["id"], referenced)
+
+    report = run(upload_gc.collect_garbage, 24)
+
+    assert os.path.exists(referenced)
+    assert not os.path.exists(orphan)
+    assert os.path.exists(recent)
+    assert report["scanned_files"] == 3
+    assert report["deleted_files"] == 1
+    assert report["freed_bytes"] == len(b"orphaned")
+    assert report["skipped_recent"] == 1
+
+def test_dry_run_reports_without_deleting(client, run, uploads):
+    orphan = uploads("static/uploads/ab/cd/orphan.jpg")
+    rendition = uploads("static/uploads/renditions/ab/cd/gone_200.webp")
+
+    report = run(upload_gc.collect_garbage, 24, upload_gc.CHUNK_SIZE, True)
+
+    assert report["dry_run"] is True
+    assert report["deleted_files"] == 2
+    assert os.path.exists(orphan)
+    assert os.path.exists(rendition)
+
+def test_renditions_without_a_source_are_deleted(client, run, uploads):
+    headers = login(client, "alice")
+    movie = create_movie(client, headers, "Poster")
+    source = uploads("static/uploads/ab/cd/kept.jpg")
+    kept = uploads("static/uploads/renditions/ab/cd/kept_200.webp")
+    orphaned = uploads("static/uploads/renditions/ab/cd/gone_200.webp")
+    recent = uploads("static/uploads/renditions/ab/cd/new_600.jpeg", age_hours=1)
+    run(set_photo_url, movie["id"], source)
+
+    report = run(upload_gc.collect_garbage, 24, 1)
+
+    assert os.path.exists(source)
+    assert os.path.exists(kept)
+    assert not os.path.exists(orphaned)
+    assert os.path.exists(recent)
+    assert report["deleted_files"] == 1
+    assert report["skipped_recent"] == 1
+
+def test_movies_with_missing_files_are_reported(client, run, uploads):
+    headers = login(client, "alice")
+    dangling = create_movie(client, headers, "Dangling")
+    create_movie(client, headers, "Default photo")
+    run(set_photo_url, dangling["id"], "static/uploads/ab/cd/missing.jpg")
+
+    report = run(upload_gc.collect_garbage, 24)
+
+    assert report["dangling_count"] == 1
+    assert report["dangling"] == [(dangling["id"], "static/uploads/ab/cd/missing.jpg")]